@@ -7,19 +7,72 @@ XPlayer - Deffcode播放器组件
 """
 
 import os
+import sys
+import logging
 import cv2
 import numpy as np
 import threading
+import queue
+import random
 import subprocess
-import tempfile
 import time
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import sounddevice as sd
-import soundfile as sf
 from deffcode import FFdecoder
 from PyQt5.QtCore import QObject, pyqtSignal, QTimer, QUrl, Qt
 from PyQt5.QtWidgets import QFrame
 from PyQt5.QtGui import QImage, QPixmap
 
+logger = logging.getLogger(__name__)
+
+# 各平台可能使用的硬件解码方式
+_HWACCEL_PRIORITY = {
+    "darwin": ("videotoolbox",),
+    "win32": ("cuda", "qsv", "d3d11va", "dxva2"),
+    "linux": ("cuda", "vaapi", "qsv", "vdpau"),
+}
+
+
+@lru_cache(maxsize=None)
+def _detect_hwaccel():
+    """
+    检测FFmpeg是否编译了当前平台的硬件解码方式
+    ffmpeg -hwaccels只列出编译进FFmpeg的方式，不代表硬件和驱动可用，
+    因此检测到后使用auto，由FFmpeg自行选择可用的方式，初始化失败时在内部回退到软件解码
+    首次创建解码器时才探测，结果缓存，不在导入模块时阻塞程序启动
+    :return: 可以使用时返回"auto"，否则返回None
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-hwaccels"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=5
+        )
+    except Exception:
+        return None
+    if result.returncode != 0:
+        return None
+    # 第一行为标题"Hardware acceleration methods:"，其后每行一个名称
+    available = set(line.strip() for line in result.stdout.splitlines()[1:] if line.strip())
+    if any(name in available for name in _HWACCEL_PRIORITY.get(sys.platform, ())):
+        return "auto"
+    return None
+
+
+# FFmpeg解码音频的命令模板，None位置依次为输入文件、采样率、声道数
+# 一次性解码为float32 PCM并写到标准输出，无需临时文件和格式转换
+_AUDIO_CMD = (
+    'ffmpeg', '-v', 'error',
+    '-i', None,
+    '-vn',  # 不处理视频
+    '-f', 'f32le', '-acodec', 'pcm_f32le',  # 输出原始float32数据
+    '-ar', None,  # 采样率
+    '-ac', None,  # 声道数
+    'pipe:1'
+)
+
+
 class DeffcodePlayer(QObject):
     """
     Deffcode播放器类，提供与VLCPlayer类似的接口
@@ -30,7 +83,8 @@ class DeffcodePlayer(QObject):
     stateChanged = pyqtSignal(int)
     positionChanged = pyqtSignal(int)
     durationChanged = pyqtSignal(int)
-    frameChanged = pyqtSignal(QImage)
+    frameChanged = pyqtSignal(QImage)  # 发送的QImage复用同一缓冲区，接收方如需跨事件保存应调用copy()
+    _seekFinished = pyqtSignal(object)  # 跳转线程完成，结果以队列方式交回界面线程
     
     # 播放状态常量，与QMediaPlayer保持一致
     StoppedState = 0
@@ -46,6 +100,7 @@ class DeffcodePlayer(QObject):
         
         # 当前媒体
         self.media_path = None  # 初始化当前媒体路径为None，用于存储当前播放的媒体文件路径
+        self._media_stat = None  # 当前媒体文件的stat结果，为None表示文件不可用
         
         # 播放列表
         self.playlist = None  # 初始化播放列表为None，用于存储播放列表
@@ -66,24 +121,56 @@ class DeffcodePlayer(QObject):
         self.duration = 0  # 初始化视频时长为0，单位为秒
         self.current_position = 0  # 初始化当前播放位置为0，单位为秒
         self.frame_rate = 0  # 初始化帧率为0，表示每秒显示的帧数
+        self._frame_time_ms = 0.0  # 每帧时长（毫秒），由帧率计算得到
+        
+        # 信号发送状态
+        self._duration_sent = False  # 标记是否已经发送过时长信号
+        self._last_emitted_pos = -1  # 上次发送的播放位置，用于过滤重复的位置信号
+        
+        # 音视频同步相关
+        self._last_sync_time = 0  # 上次同步时间
+        self._last_seek_position = 0  # 上次跳转位置
+        
+        # 输出帧格式，4通道BGRA可直接对应Qt的32位图像格式，绘制更快
+        self.frame_format = "bgra"
+        self._qimg_buf = None  # 显示帧缓冲区，按分辨率分配一次并复用
+        self._qimage = None  # 包装显示帧缓冲区的QImage
+        self._prev_qimg_buf = None  # 分辨率变化前的缓冲区，显示组件可能仍持有包装它的QImage
+        
+        # 硬件解码
+        self.prefer_hwaccel = True  # 优先使用硬件解码，失败时回退到软件解码
+        
+        # 播放列表预先打开的解码器，下次从头播放当前媒体时直接使用
+        self._prepared_decoder = None
         
         # 帧缓冲区，用于提高跳转性能
         self.frame_buffer_size = 5  # 缓冲5帧，用于提高跳转时的流畅度
-        self.frame_buffer = []  # 初始化帧缓冲区为空列表
+        self.frame_buffer = deque(maxlen=self.frame_buffer_size)  # 初始化帧缓冲区为定长双端队列
         
         # 音频相关
         self.audio_stream = None  # 初始化音频流为None，用于存储音频流数据
         self.audio_data = None  # 初始化音频数据为None，用于存储音频数据
+        self._has_audio = False  # 音频数据是否已加载，跳转等路径只检查此标记
         self.audio_playing = False  # 初始化音频播放状态为False，表示未播放
         self.audio_paused = False  # 初始化音频暂停状态为False，表示未暂停
         self.audio_position = 0  # 初始化音频播放位置为0，单位为秒
-        self.audio_thread = None  # 初始化音频线程为None，用于后续设置具体的音频处理线程
         self.audio_sample_rate = 44100  # 默认采样率为44100Hz
         self.audio_channels = 2  # 默认双声道
         
+        # 常驻音频工作线程，通过命令队列接收定位和播放命令，避免每次跳转都创建新线程
+        self._audio_cmd_q = queue.Queue()
+        self.audio_thread = threading.Thread(target=self._audio_loop, daemon=True)
+        self.audio_thread.start()
+        
+        # 跳转线程，单线程保证跳转按顺序执行
+        self._seek_executor = ThreadPoolExecutor(max_workers=1)
+        self._seek_serial = 0  # 跳转序号，用于丢弃过期的跳转结果
+        self._last_err_log = 0.0  # 上次记录跳转错误的时间，用于限制日志频率
+        self._seekFinished.connect(self._on_seek_finished)
+        
         # 创建定时器，用于更新播放位置和帧
         self.timer = QTimer(self)  # 创建一个QTimer对象，用于定时触发事件
-        self.timer.setInterval(33)  # 约30fps
+        self.timer.setInterval(33)  # 约30fps，解码器初始化后按实际帧率调整
         self.timer.timeout.connect(self._update_frame)
         
         # 创建定时器，用于更新播放位置
@@ -103,59 +190,65 @@ class DeffcodePlayer(QObject):
             # 首先检查帧缓冲区是否有帧
             if self.frame_buffer:
                 # 从缓冲区获取一帧
-                frame = self.frame_buffer.pop(0)
+                frame = self.frame_buffer.popleft()
             else:
                 # 缓冲区为空，直接从解码器获取帧
                 try:
-                    frame = next(self.frame_generator, None)
+                    frame = self._read_frame()
                 except Exception as e:
-                    print(f"获取下一帧错误: {e}")
+                    logger.warning("获取下一帧错误: %s", e)
                     frame = None
                     
             # 如果没有帧，可能是播放结束
             if frame is None:
-                print("没有更多帧，播放结束")
+                logger.debug("没有更多帧，播放结束")
                 self.stop()
                 # 如果有播放列表，播放下一个
                 if self.playlist:
                     self.playlist.next()
                 return
                 
-            # 更新当前位置（基于帧率计算）
-            if self.frame_rate > 0:
-                # 计算每帧的时间（毫秒）
-                frame_time = 1000.0 / self.frame_rate
-                # 更新当前位置
-                self.current_position += frame_time
+            # 更新当前位置（每帧时长在初始化解码器时预先计算）
+            self.current_position += self._frame_time_ms
                 
-            # 转换帧为QImage并发送信号
-            if isinstance(frame, np.ndarray):
-                # 确保帧是BGR格式
-                if frame.shape[2] == 3:  # 3通道图像
-                    height, width, channels = frame.shape
-                    bytes_per_line = channels * width
-                    # 创建QImage
-                    qimage = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-                    # BGR到RGB转换
-                    qimage = qimage.rgbSwapped()
-                    # 发送帧变化信号
-                    self.frameChanged.emit(qimage)
+            # 将帧复制到QImage缓冲区并发送信号，仅处理4通道BGRA帧
+            if frame.ndim == 3 and frame.shape[2] == 4:
+                # 首帧或分辨率变化时分配缓冲区，并创建包装该缓冲区的QImage
+                if self._qimg_buf is None or self._qimg_buf.shape != frame.shape:
+                    height, width = frame.shape[:2]
+                    # 旧QImage不拥有数据，保留旧缓冲区直到下一次分辨率变化，避免显示组件读到已释放的内存
+                    self._prev_qimg_buf = self._qimg_buf
+                    self._qimg_buf = np.empty(frame.shape, dtype=np.uint8)
+                    # BGRA字节序即Qt的32位格式，无需颜色转换，行字节数直接取自数组步长
+                    self._qimage = QImage(self._qimg_buf.data, width, height,
+                                          self._qimg_buf.strides[0], QImage.Format_RGB32)
+                # 复制到固定缓冲区后不再持有解码帧的引用，numpy复制期间释放GIL，不阻塞音频和跳转线程
+                np.copyto(self._qimg_buf, frame)
+                # 发送帧变化信号
+                self.frameChanged.emit(self._qimage)
                     
             # 尝试填充帧缓冲区
-            while len(self.frame_buffer) < self.frame_buffer_size:
+            while len(self.frame_buffer) < self.frame_buffer.maxlen:
                 try:
-                    next_frame = next(self.frame_generator, None)
+                    next_frame = self._read_frame()
                     if next_frame is None:
                         break
                     self.frame_buffer.append(next_frame)
                 except Exception as e:
-                    print(f"填充帧缓冲区错误: {e}")
+                    logger.warning("填充帧缓冲区错误: %s", e)
                     break
                     
         except Exception as e:
-            print(f"更新帧错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("更新帧错误: %s", e)
+    
+    def _read_frame(self, generator=None):
+        """
+        从解码器读取一帧
+        deffcode每帧都返回新数组，直接保存即可，显示时只复制一次到显示缓冲区
+        :param generator: 帧生成器，默认为当前解码器的帧生成器
+        :return: 帧数据，没有更多帧时返回None
+        """
+        return next(self.frame_generator if generator is None else generator, None)
     
     def _update_position(self):
         """
@@ -163,23 +256,19 @@ class DeffcodePlayer(QObject):
         由position_timer定时器触发，负责更新和发送当前播放位置
         """
         if self._state == self.PlayingState:
-            # 发送位置变化信号
-            self.positionChanged.emit(int(self.current_position))
+            # 发送位置变化信号，位置未变化时不重复发送
+            pos = int(self.current_position)
+            if pos != self._last_emitted_pos:
+                self.positionChanged.emit(pos)
+                self._last_emitted_pos = pos
             
             # 检查是否播放结束
             if self.duration > 0 and self.current_position >= self.duration:
-                print("播放位置到达结尾，停止播放")
+                logger.debug("播放位置到达结尾，停止播放")
                 self.stop()
                 # 如果有播放列表，播放下一个
                 if self.playlist:
                     self.playlist.next()
-        
-        # 标记是否已经发送过时长信号
-        self._duration_sent = False
-        
-        # 音视频同步相关
-        self._last_sync_time = 0  # 上次同步时间
-        self._last_seek_position = 0  # 上次跳转位置
     
     def setVideoOutput(self, video_widget):
         """
@@ -201,19 +290,81 @@ class DeffcodePlayer(QObject):
         :param content: 文件路径
         """
         if hasattr(content, 'canonicalUrl'):
-            # 如果是QMediaContent，获取URL
-            url = content.canonicalUrl().toString()
-            if url.startswith('file:///'):
-                url = url[8:]  # 移除file:///前缀
-            self.media_path = url
+            # 如果是QMediaContent，本地文件取本地路径（兼容各平台），否则保留URL
+            url = content.canonicalUrl()
+            media_path = url.toLocalFile() or url.toString()
         else:
             # 否则假设是文件路径
-            self.media_path = content
+            media_path = content
+        
+        # 预先打开的解码器属于之前的媒体，不再使用
+        self._discard_prepared()
+        
+        # 仅在路径变化时重新检查文件，避免网络挂载路径上重复的阻塞调用
+        if media_path != self.media_path or self._media_stat is None:
+            try:
+                self._media_stat = os.stat(media_path)
+            except (OSError, TypeError, ValueError):
+                self._media_stat = None
+        self.media_path = media_path
         
         # 重置状态
         self._state = self.StoppedState
         self.stateChanged.emit(self._state)
     
+    def setPreparedSource(self, media_path, decoder):
+        """
+        设置媒体内容，并使用已预先打开的解码器，省去播放时打开文件和探测格式的耗时
+        :param media_path: 文件路径
+        :param decoder: prepareSource返回的解码器
+        """
+        self.setMedia(media_path)
+        self._prepared_decoder = decoder
+    
+    def prepareSource(self, media_path):
+        """
+        预先打开媒体文件的解码器，可在后台线程中调用
+        :param media_path: 文件路径
+        :return: 已初始化的FFdecoder实例，失败时返回None
+        """
+        try:
+            return self._create_decoder(frame_format=self.frame_format, media_path=media_path)
+        except Exception as e:
+            logger.debug("预先打开媒体失败(%s): %s", media_path, e)
+            return None
+    
+    def _discard_prepared(self):
+        """
+        关闭未使用的预先打开的解码器
+        """
+        if self._prepared_decoder is not None:
+            try:
+                self._prepared_decoder.terminate()
+            except Exception:
+                pass
+            self._prepared_decoder = None
+    
+    def _create_decoder(self, frame_format="bgra", media_path=None, **ffparams):
+        """
+        创建解码器
+        优先使用硬件解码，构造失败时回退到软件解码
+        :param frame_format: 输出帧格式
+        :param media_path: 文件路径，默认为当前媒体
+        :param ffparams: 传递给FFdecoder的FFmpeg参数
+        :return: 已初始化的FFdecoder实例
+        """
+        if media_path is None:
+            media_path = self.media_path
+        hwaccel = _detect_hwaccel() if self.prefer_hwaccel else None
+        if hwaccel:
+            try:
+                hw_params = dict(ffparams)
+                hw_params['-ffprefixes'] = ['-hwaccel', hwaccel]
+                return FFdecoder(media_path, frame_format=frame_format, **hw_params).formulate()
+            except Exception as e:
+                logger.warning("硬件解码(%s)初始化失败，回退到软件解码: %s", hwaccel, e)
+        return FFdecoder(media_path, frame_format=frame_format, **ffparams).formulate()
+    
     def _init_decoder(self):
         """
         初始化解码器
@@ -229,8 +380,11 @@ class DeffcodePlayer(QObject):
             
         # 停止音频播放
         self._stop_audio()
+        
+        # 丢弃尚未完成的跳转
+        self._seek_serial += 1
             
-        if not self.media_path or not os.path.exists(self.media_path):
+        if not self.media_path or self._media_stat is None:
             return False
             
         try:
@@ -238,52 +392,64 @@ class DeffcodePlayer(QObject):
             # 检查是否需要从特定位置开始播放
             if hasattr(self, 'seek_position') and self.seek_position > 0:
                 seek_seconds = self.seek_position / 1000.0
-                print(f"使用seek初始化解码器，跳转到: {seek_seconds}秒")
-                self.decoder = FFdecoder(
-                    self.media_path, 
-                    frame_format="bgr24",
+                logger.debug("使用seek初始化解码器，跳转到: %s秒", seek_seconds)
+                self.decoder = self._create_decoder(
+                    frame_format=self.frame_format,
                     **{'-ss': str(seek_seconds)}  # 使用FFmpeg的seek参数
-                ).formulate()
+                )
                 # 重置seek位置
                 self.current_position = self.seek_position
                 self.seek_position = 0
+                self._discard_prepared()
+            elif self._prepared_decoder is not None:
+                # 使用播放列表预先打开的解码器
+                self.decoder = self._prepared_decoder
+                self._prepared_decoder = None
             else:
-                self.decoder = FFdecoder(self.media_path, frame_format="bgr24").formulate()
+                self.decoder = self._create_decoder(frame_format=self.frame_format)
             
             # 创建帧生成器
             self.frame_generator = self.decoder.generateFrame()
             
             # 清空并填充帧缓冲区
-            self.frame_buffer = []
+            self.frame_buffer = deque(maxlen=self.frame_buffer_size)
             # 预读取几帧到缓冲区
             for _ in range(self.frame_buffer_size):
                 try:
-                    frame = next(self.frame_generator, None)
+                    frame = self._read_frame()
                     if frame is None:
                         break
                     self.frame_buffer.append(frame)
                 except Exception as e:
-                    print(f"初始填充帧缓冲区错误: {e}")
+                    logger.warning("初始填充帧缓冲区错误: %s", e)
                     break
             
-            print(f"初始化解码器完成，已预加载{len(self.frame_buffer)}帧")
+            logger.debug("初始化解码器完成，已预加载%s帧", len(self.frame_buffer))
             
             # 获取视频信息
             metadata = self.decoder.metadata
-            print(f"视频元数据: {metadata}")
+            logger.debug("视频元数据: %s", metadata)
             
             # 安全获取帧率
             try:
                 if isinstance(metadata, dict) and "source_video_framerate" in metadata:
                     self.frame_rate = float(metadata["source_video_framerate"])
-                    print(f"获取到帧率: {self.frame_rate}")
+                    logger.debug("获取到帧率: %s", self.frame_rate)
                 else:
                     self.frame_rate = 30.0  # 默认帧率
-                    print(f"使用默认帧率: {self.frame_rate}")
+                    logger.debug("使用默认帧率: %s", self.frame_rate)
             except (KeyError, ValueError, TypeError) as e:
-                print(f"获取帧率错误: {e}")
+                logger.warning("获取帧率错误: %s", e)
                 self.frame_rate = 30.0  # 默认帧率
             
+            # 可变帧率等情况下帧率无效，回退到默认30fps
+            if self.frame_rate <= 0:
+                self.frame_rate = 30.0
+            
+            # 每帧时长（毫秒），并按实际帧率设置帧定时器间隔
+            self._frame_time_ms = 1000.0 / self.frame_rate
+            self.timer.setInterval(max(1, int(round(self._frame_time_ms))))
+            
             # 计算视频时长（毫秒）
             try:
                 # 重置时长
@@ -297,9 +463,9 @@ class DeffcodePlayer(QObject):
                         duration_sec = float(duration_str)
                         if duration_sec > 0:
                             self.duration = int(duration_sec * 1000)
-                            print(f"从source_duration_sec获取到视频时长: {self.duration}ms")
+                            logger.debug("从source_duration_sec获取到视频时长: %sms", self.duration)
                     except (ValueError, TypeError) as e:
-                        print(f"处理source_duration_sec错误: {e}")
+                        logger.warning("处理source_duration_sec错误: %s", e)
                 
                 # 如果上面的方法失败，尝试从FFmpeg格式信息中获取时长
                 if self.duration <= 0 and isinstance(metadata, dict):
@@ -316,10 +482,10 @@ class DeffcodePlayer(QObject):
                                     duration_float = float(str(duration_str))
                                     if duration_float > 0:
                                         self.duration = int(duration_float * 1000)
-                                        print(f"从键'{key}'获取到视频时长: {self.duration}ms")
+                                        logger.debug("从键'%s'获取到视频时长: %sms", key, self.duration)
                                         break
                                 except ValueError:
-                                    print(f"无法将'{duration_str}'转换为浮点数")
+                                    logger.debug("无法将'%s'转换为浮点数", duration_str)
                 
                 # 如果上面的方法失败，尝试从帧数和帧率计算
                 if self.duration <= 0 and isinstance(metadata, dict) and self.frame_rate > 0:
@@ -331,17 +497,16 @@ class DeffcodePlayer(QObject):
                                 nb_frames = float(str(metadata[key]))
                                 if nb_frames > 0:
                                     self.duration = int((nb_frames / self.frame_rate) * 1000)
-                                    print(f"通过帧数计算视频时长: {self.duration}ms")
+                                    logger.debug("通过帧数计算视频时长: %sms", self.duration)
                                     break
                             except (ValueError, TypeError):
-                                print(f"无法将'{metadata[key]}'转换为帧数")
+                                logger.debug("无法将'%s'转换为帧数", metadata[key])
                 
                 # 如果仍然无法获取时长，尝试使用其他元数据字段
                 if self.duration <= 0 and isinstance(metadata, dict):
-                    # 打印所有元数据，帮助调试
-                    print("所有元数据字段:")
-                    for key, value in metadata.items():
-                        print(f"  {key}: {value}")
+                    # 输出所有元数据，帮助调试（仅在DEBUG级别下格式化）
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("所有元数据字段: %s", metadata)
                     
                     # 尝试从比特率和文件大小估算
                     if "bit_rate" in metadata and "size" in metadata:
@@ -351,11 +516,11 @@ class DeffcodePlayer(QObject):
                             if bit_rate > 0:
                                 # 估算时长 = 文件大小(字节) * 8 / 比特率(bps)
                                 self.duration = int((size * 8 / bit_rate) * 1000)
-                                print(f"通过比特率估算视频时长: {self.duration}ms")
+                                logger.debug("通过比特率估算视频时长: %sms", self.duration)
                         except (ValueError, TypeError, ZeroDivisionError):
                             pass
             except Exception as e:
-                print(f"计算视频时长错误: {e}")
+                logger.warning("计算视频时长错误: %s", e)
                 self.duration = 0
                 
             # 确保时长大于0，否则UI可能无法正常显示
@@ -374,54 +539,39 @@ class DeffcodePlayer(QObject):
                         duration_sec = float(result.stdout.strip())
                         if duration_sec > 0:
                             self.duration = int(duration_sec * 1000)
-                            print(f"通过FFprobe获取视频时长: {self.duration}ms")
+                            logger.debug("通过FFprobe获取视频时长: %sms", self.duration)
                 except Exception as e:
-                    print(f"FFprobe获取时长失败: {e}")
+                    logger.warning("FFprobe获取时长失败: %s", e)
                 
                 # 如果仍然无法获取时长，设置一个默认值
                 if self.duration <= 0:
                     # 设置一个更合理的默认时长，避免UI问题
                     self.duration = 3600000  # 默认1小时
-                    print("无法获取准确时长，使用默认值1小时")
+                    logger.debug("无法获取准确时长，使用默认值1小时")
                     
             # 发送时长变化信号
             self.durationChanged.emit(self.duration)
-            print(f"发送时长信号: {self.duration}ms")
+            self._duration_sent = True
+            logger.debug("发送时长信号: %sms", self.duration)
             
             # 初始化音频播放器
             self._init_audio_player()
             
             return True
         except Exception as e:
-            print(f"初始化解码器错误: {e}")
+            logger.warning("初始化解码器错误: %s", e)
             return False
             
     def _audio_callback(self, outdata, frames, time, status):
         """音频回调函数"""
         if status:
-            print(f'音频回调状态: {status}')
+            logger.debug("音频回调状态: %s", status)
             
         if not self.audio_playing or self.audio_paused:
             outdata.fill(0)
             return
-            
-        # 检查是否需要重新定位音频位置
-        if hasattr(self, 'seek_position') and self.seek_position > 0:
-            try:
-                position_samples = int((self.seek_position / 1000.0) * self.audio_sample_rate)
-                if position_samples >= len(self.audio_data):
-                    position_samples = max(0, len(self.audio_data) - 1)
-                self.audio_position = position_samples
-                self.seek_position = 0
-                outdata.fill(0)
-                return
-            except Exception as e:
-                print(f"音频位置同步错误: {e}")
-                self.seek_position = 0
-                outdata.fill(0)
-                return
         
-        # 处理音频数据
+        # 处理音频数据，跳转时由_seek_audio直接修改audio_position，回调只负责按位置复制
         try:
             available = len(self.audio_data) - self.audio_position
             if available < frames:
@@ -432,51 +582,41 @@ class DeffcodePlayer(QObject):
                 outdata[:] = self.audio_data[self.audio_position:self.audio_position+frames]
                 self.audio_position += frames
         except Exception as e:
-            print(f"音频数据处理错误: {e}")
+            logger.warning("音频数据处理错误: %s", e)
             outdata.fill(0)
     
     def _init_audio_player(self):
         """
         初始化音频播放器
-        使用sounddevice和soundfile处理音频播放
+        使用FFmpeg解码音频，sounddevice处理音频播放
         """
         try:
             # 停止之前的音频流
             self._stop_audio()
             
-            # 使用FFmpeg提取音频到临时文件
-            temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            temp_audio_path = temp_audio.name
-            temp_audio.close()
-            
-            # 使用FFmpeg提取音频
-            import subprocess
-            cmd = [
-                'ffmpeg', '-y',
-                '-i', self.media_path,
-                '-vn',  # 不处理视频
-                '-acodec', 'pcm_s16le',  # 转换为WAV格式
-                '-ar', str(self.audio_sample_rate),  # 采样率
-                '-ac', str(self.audio_channels),  # 声道数
-                temp_audio_path
-            ]
+            # 使用FFmpeg解码音频，按模板填入输入文件、采样率和声道数
+            cmd = list(_AUDIO_CMD)
+            cmd[4] = self.media_path
+            cmd[11] = str(self.audio_sample_rate)
+            cmd[13] = str(self.audio_channels)
             
-            # 如果有seek位置，添加seek参数
+            # 如果有seek位置，在输入文件前添加seek参数
             if hasattr(self, 'seek_position') and self.seek_position > 0:
-                cmd.insert(2, '-ss')
-                cmd.insert(3, str(self.seek_position / 1000.0))
+                cmd[3:3] = ['-ss', str(self.seek_position / 1000.0)]
             
-            subprocess.run(cmd, check=True)
+            # 整段音频一次解码到内存，之后跳转只需移动读取位置
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
             
-            # 读取音频文件
-            self.audio_data, self.audio_sample_rate = sf.read(temp_audio_path)
-            os.unlink(temp_audio_path)  # 删除临时文件
+            # 直接按float32二维数组解释输出数据，与输出流格式一致，回调中无需再转换
+            self.audio_data = np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, self.audio_channels)
+            self._has_audio = True
             
             # 创建音频流
             self.audio_stream = sd.OutputStream(
                 channels=self.audio_channels,
                 samplerate=self.audio_sample_rate,
-                callback=self._audio_callback
+                callback=self._audio_callback,
+                dtype='float32'
             )
             
             # 设置播放状态
@@ -484,18 +624,19 @@ class DeffcodePlayer(QObject):
             self.audio_paused = True  # 初始状态为暂停
             
             # 记录音频信息，便于调试
-            print(f"音频数据大小: {len(self.audio_data) if self.audio_data is not None else 0} 样本")
-            print(f"音频参数: 通道数={self.audio_channels}, 采样率={self.audio_sample_rate}, 总样本数={len(self.audio_data) if self.audio_data is not None else 0}")
-            print("音频流已创建")
+            logger.debug("音频数据大小: %s 样本", len(self.audio_data))
+            logger.debug("音频参数: 通道数=%s, 采样率=%s, 总样本数=%s", self.audio_channels, self.audio_sample_rate, len(self.audio_data))
+            logger.debug("音频流已创建")
             
             # 启动音频流 - 注意：不再在这里启动，而是在play方法中统一启动
             # 这样可以确保第一次播放时也能正确启动音频
             
-            print(f"音频播放器初始化完成: {self.media_path}")
+            logger.debug("音频播放器初始化完成: %s", self.media_path)
             
         except Exception as e:
-            print(f"初始化音频播放器错误: {e}")
+            logger.warning("初始化音频播放器错误: %s", e)
             self.audio_stream = None
+            self._has_audio = False
             self.audio_data = None
                 
 
@@ -503,42 +644,54 @@ class DeffcodePlayer(QObject):
 
 
     
+    def _audio_loop(self):
+        """
+        音频工作线程
+        常驻后台，阻塞等待命令队列，依次处理音频流的定位和启动命令
+        """
+        while True:
+            cmd, arg = self._audio_cmd_q.get()
+            try:
+                if cmd == 'seek':
+                    self._seek_audio(arg)
+                elif cmd == 'play':
+                    self._play_audio()
+            except Exception as e:
+                logger.warning("音频命令处理错误(%s): %s", cmd, e)
+    
+    def _seek_audio(self, position):
+        """
+        定位音频播放位置
+        :param position: 位置（毫秒）
+        """
+        if not self._has_audio:
+            return
+        position_samples = int((position / 1000.0) * self.audio_sample_rate)
+        self.audio_position = max(0, min(position_samples, len(self.audio_data) - 1))
+    
     def _play_audio(self):
         """
-        播放音频线程方法
-        使用sounddevice播放音频数据
+        启动音频播放
+        由音频工作线程调用，音频流未创建时创建，未启动时启动
         """
-        try:
-            # 确保有音频数据
-            if self.audio_data is None:
-                return
-                
-            # 创建音频流
+        # 确保有音频数据
+        if not self._has_audio:
+            return
+            
+        # 创建音频流
+        if self.audio_stream is None:
             self.audio_stream = sd.OutputStream(
                 samplerate=self.audio_sample_rate,
                 channels=self.audio_channels,
                 callback=self._audio_callback,
                 dtype='float32'
             )
-            
-            # 启动音频流
+        
+        # 启动音频流
+        if not self.audio_stream.active:
             self.audio_stream.start()
-            self.audio_playing = True
-            self.audio_paused = False
-            
-            # 等待音频播放完成
-            while self.audio_playing:
-                time.sleep(0.1)
-                
-        except Exception as e:
-            print(f"音频播放错误: {e}")
-        finally:
-            # 确保停止音频流
-            if hasattr(self, 'audio_stream') and self.audio_stream:
-                self.audio_stream.stop()
-                self.audio_stream.close()
-                self.audio_stream = None
-            self.audio_playing = False
+        self.audio_playing = True
+        self.audio_paused = False
 
     def _stop_audio(self):
         """
@@ -549,14 +702,14 @@ class DeffcodePlayer(QObject):
         self.audio_paused = True
         
         # 停止并关闭音频流
-        if hasattr(self, 'audio_stream') and self.audio_stream:
+        if self.audio_stream:
             try:
                 if self.audio_stream.active:
                     self.audio_stream.stop()
                 self.audio_stream.close()
-                print("音频流已关闭")
+                logger.debug("音频流已关闭")
             except Exception as e:
-                print(f"关闭音频流错误: {e}")
+                logger.warning("关闭音频流错误: %s", e)
             self.audio_stream = None
         
         # 检查是否是因为跳转位置而调用此方法
@@ -567,11 +720,11 @@ class DeffcodePlayer(QObject):
         
         # 记录状态信息
         if is_seeking:
-            print("跳转位置中，暂停音频播放")
+            logger.debug("跳转位置中，暂停音频播放")
         elif is_temporary_stop:
-            print("暂时停止，暂停音频播放")
+            logger.debug("暂时停止，暂停音频播放")
         else:
-            print("音频播放已停止")
+            logger.debug("音频播放已停止")
 
     
     def play(self):
@@ -591,11 +744,11 @@ class DeffcodePlayer(QObject):
         self._state = self.PlayingState
         self.stateChanged.emit(self._state)
         
-        # 确保时长信号已发送
-        if self.duration > 0:
+        # 确保时长信号已发送，已发送过则不再重复
+        if self.duration > 0 and not self._duration_sent:
             self.durationChanged.emit(self.duration)
             self._duration_sent = True
-            print(f"播放时发送时长信号: {self.duration}ms")
+            logger.debug("播放时发送时长信号: %sms", self.duration)
         
         # 启动定时器
         self.timer.start()
@@ -604,67 +757,67 @@ class DeffcodePlayer(QObject):
         # 确保音频播放状态正确设置
         self.audio_playing = True
         self.audio_paused = False
-        print("音频播放状态已设置: playing=True, paused=False")
+        logger.debug("音频播放状态已设置: playing=True, paused=False")
         
         # 如果需要，初始化音频播放器
-        if not hasattr(self, 'audio_data') or self.audio_data is None or self.audio_stream is None:
-            print("音频数据或流不存在，初始化音频播放器")
+        if not self._has_audio or self.audio_stream is None:
+            logger.debug("音频数据或流不存在，初始化音频播放器")
             self._init_audio_player()
             # 重新设置播放状态，因为_init_audio_player会将paused设为True
             self.audio_paused = False
         
         # 启动音频流 - 确保在每次播放时都正确启动音频流
-        if hasattr(self, 'audio_stream') and self.audio_stream:
+        if self.audio_stream:
             try:
                 # 无论是否active，都尝试先停止再启动，确保状态一致
                 if self.audio_stream.active:
                     self.audio_stream.stop()
-                    print("停止已激活的音频流")
+                    logger.debug("停止已激活的音频流")
                 
                 # 启动音频流
                 self.audio_stream.start()
-                print("音频流已启动")
+                logger.debug("音频流已启动")
                 
                 # 如果有设置位置，确保音频位置正确
                 if hasattr(self, 'current_position') and self.current_position > 0:
                     position_samples = int((self.current_position / 1000.0) * self.audio_sample_rate)
                     if position_samples < len(self.audio_data):
                         self.audio_position = position_samples
-                        print(f"音频位置已设置到: {self.current_position}ms (样本位置: {position_samples})")
+                        logger.debug("音频位置已设置到: %sms (样本位置: %s)", self.current_position, position_samples)
                 else:
                     # 确保从头开始播放
                     self.audio_position = 0
-                    print("音频位置已重置为开始位置")
+                    logger.debug("音频位置已重置为开始位置")
                 
-                print("音频播放已启动，准备播放音频数据")
+                logger.debug("音频播放已启动，准备播放音频数据")
                 
             except Exception as e:
-                print(f"启动音频流错误: {e}")
+                logger.warning("启动音频流错误: %s", e)
                 # 尝试重新初始化音频
                 self._init_audio_player()
                 # 重新设置播放状态
                 self.audio_paused = False
                 # 再次尝试启动
-                if hasattr(self, 'audio_stream') and self.audio_stream:
+                if self.audio_stream:
                     try:
                         self.audio_stream.start()
-                        print("音频播放已重新初始化并启动")
+                        logger.debug("音频播放已重新初始化并启动")
                     except Exception as e:
-                        print(f"第二次尝试启动音频流失败: {e}")
+                        logger.warning("第二次尝试启动音频流失败: %s", e)
         else:
-            print("音频流不可用，尝试重新初始化")
+            logger.debug("音频流不可用，尝试重新初始化")
             self._init_audio_player()
             # 重新设置播放状态
             self.audio_paused = False
             # 初始化后再次尝试启动
-            if hasattr(self, 'audio_stream') and self.audio_stream:
+            if self.audio_stream:
                 try:
                     self.audio_stream.start()
-                    print("音频播放已初始化并启动")
+                    logger.debug("音频播放已初始化并启动")
                 except Exception as e:
-                    print(f"初始化后启动音频流失败: {e}")
+                    logger.warning("初始化后启动音频流失败: %s", e)
             
-        print("音频播放流程完成")
+        logger.debug("音频播放流程完成")
     
     def pause(self):
         """
@@ -683,7 +836,7 @@ class DeffcodePlayer(QObject):
         
         # 暂停音频
         self.audio_paused = True
-        print("音频播放已暂停")
+        logger.debug("音频播放已暂停")
     
     def stop(self):
         """
@@ -696,18 +849,22 @@ class DeffcodePlayer(QObject):
         # 停止音频播放
         self._stop_audio()
         
+        # 丢弃尚未完成的跳转
+        self._seek_serial += 1
+        
         # 关闭解码器
         if self.decoder:
             try:
                 # 使用terminate方法安全地终止所有进程
                 self.decoder.terminate()
             except Exception as e:
-                print(f"关闭解码器错误: {e}")
+                logger.warning("关闭解码器错误: %s", e)
             self.decoder = None
         
         # 重置位置
         self.current_position = 0
         self.positionChanged.emit(0)
+        self._last_emitted_pos = 0
         
         # 重置时长发送标记
         self._duration_sent = False
@@ -719,6 +876,7 @@ class DeffcodePlayer(QObject):
     def setPosition(self, position):
         """
         设置播放位置
+        打开新解码器和预读帧在跳转线程中完成，界面线程立即返回
         :param position: 位置（毫秒）
         """
         # 确保解码器已初始化且位置有效
@@ -730,15 +888,12 @@ class DeffcodePlayer(QObject):
             position = 0
         if position > self.duration:
             position = self.duration
-            
-        print(f"尝试设置位置到: {position}ms")
         
-        # 保存当前状态
-        was_playing = (self._state == self.PlayingState)
-        
-        # 计算目标时间（秒）
-        target_time = position / 1000.0
-        print(f"目标时间位置: {target_time}秒")
+        # 正在播放且目标位置与当前位置几乎相同，无需重新跳转
+        if abs(position - self.current_position) < 10 and self.audio_playing and not self.audio_paused:
+            return
+            
+        logger.debug("尝试设置位置到: %sms", position)
         
         # 暂停当前播放但不重置位置
         if self.timer.isActive():
@@ -747,132 +902,150 @@ class DeffcodePlayer(QObject):
             self.position_timer.stop()
         
         try:
-            # 设置当前位置和seek位置
+            # 设置当前位置
             self.current_position = position
-            self.seek_position = position
             self.positionChanged.emit(self.current_position)
+            self._last_emitted_pos = self.current_position
             
-            # 优化的跳转方法：使用预缓冲和快速seek
-            if self.decoder and hasattr(self.decoder, 'frame_generator'):
-                # 暂停音频但不完全停止，以便在新位置继续播放
-                # 设置音频暂停状态
-                self.audio_paused = True
-                self.audio_playing = False
-                print(f"音频播放暂停，准备跳转到: {position}ms")
-                
-                # 使用快速seek方法处理视频
-                seek_seconds = position / 1000.0
-                
-                # 保存当前解码器的参数
-                current_format = self.decoder.frame_format if hasattr(self.decoder, 'frame_format') else "bgr24"
-                
-                # 尝试使用更高效的seek方法
+            if not hasattr(self, 'frame_generator'):
+                # 如果没有帧生成器，回退到完全重新初始化
+                logger.debug("解码器不可用，使用完全重新初始化方法")
+                self._reinit_at(position)
+                return
+            
+            # 暂停音频但不完全停止，以便在新位置继续播放
+            self.audio_paused = True
+            self.audio_playing = False
+            logger.debug("音频播放暂停，准备跳转到: %sms", position)
+            
+            # 提交到跳转线程，连续跳转时只有最后一次的结果会被采用
+            self._seek_serial += 1
+            self._seek_executor.submit(self._do_seek, self._seek_serial, position)
+        except Exception:
+            self._log_seek_error(position)
+    
+    def _do_seek(self, serial, position):
+        """
+        在跳转线程中打开新位置的解码器并预读帧，完成后通过信号交给界面线程
+        :param serial: 跳转序号
+        :param position: 位置（毫秒）
+        """
+        # 已有更新的跳转，跳过本次
+        if serial != self._seek_serial:
+            return
+        try:
+            # 使用相同的参数但添加seek参数创建新的解码器
+            decoder = self._create_decoder(
+                frame_format=self.frame_format,
+                **{
+                    '-ss': str(position / 1000.0),  # 使用FFmpeg的seek参数
+                    '-analyzeduration': '10000000',  # 增加分析时间
+                    '-probesize': '10000000'  # 增加探测大小
+                }
+            )
+            generator = decoder.generateFrame()
+            
+            # 增加缓冲区大小以提高跳转后的流畅度，预加载更多帧以提高响应速度
+            buffer = deque(maxlen=self.frame_buffer_size * 2)
+            for _ in range(buffer.maxlen):
                 try:
-                    # 关闭当前解码器但不完全释放资源
-                    if hasattr(self.decoder, 'close'):
-                        self.decoder.close()
-                    
-                    # 使用相同的参数但添加seek参数创建新的解码器
-                    # 增加缓冲区大小以提高跳转后的流畅度
-                    self.decoder = FFdecoder(
-                        self.media_path, 
-                        frame_format=current_format,
-                        **{
-                            '-ss': str(seek_seconds),  # 使用FFmpeg的seek参数
-                            '-analyzeduration': '10000000',  # 增加分析时间
-                            '-probesize': '10000000'  # 增加探测大小
-                        }
-                    ).formulate()
-                    
-                    # 创建新的帧生成器
-                    self.frame_generator = self.decoder.generateFrame()
-                    
-                    # 清空并预加载更多帧到缓冲区以提高响应速度
-                    self.frame_buffer = []
-                    
-                    # 增加缓冲区大小以提高跳转后的流畅度
-                    temp_buffer_size = self.frame_buffer_size * 2
-                    
-                    # 预读取更多帧到缓冲区
-                    for _ in range(temp_buffer_size):
-                        try:
-                            frame = next(self.frame_generator, None)
-                            if frame is None:
-                                break
-                            self.frame_buffer.append(frame)
-                        except Exception as e:
-                            print(f"填充帧缓冲区错误: {e}")
-                            break
-                    
-                    print(f"成功使用快速seek跳转到: {position}ms，已预加载{len(self.frame_buffer)}帧")
-                    
-                    # 如果之前是播放状态，继续播放
-                    if was_playing:
-                        # 设置状态为播放
-                        self._state = self.PlayingState
-                        self.stateChanged.emit(self._state)
-                        
-                        # 启动定时器
-                        self.timer.start()
-                        self.position_timer.start()
-                        
-                        # 继续音频播放（从新位置开始）
-                        if was_playing:
-                            # 恢复音频播放
-                            self.audio_paused = False
-                            self.audio_playing = True
-                            print("音频播放已从新位置继续")
+                    frame = self._read_frame(generator)
+                    if frame is None:
+                        break
+                    buffer.append(frame)
                 except Exception as e:
-                    print(f"快速seek失败，回退到重新初始化解码器: {e}")
-                    # 如果快速seek失败，回退到完全重新初始化解码器
-                    if not self._init_decoder():
-                        raise Exception("重新初始化解码器失败")
-                    
-                    # 如果之前是播放状态，继续播放
-                    if was_playing:
-                        # 设置状态为播放
-                        self._state = self.PlayingState
-                        self.stateChanged.emit(self._state)
-                        
-                        # 启动定时器
-                        self.timer.start()
-                        self.position_timer.start()
-                        
-                        # 确保音频播放被重新启动
-                        self.audio_paused = False
-                        self.audio_playing = True
-                        print("音频播放已从新位置继续")
-            else:
-                # 如果解码器不可用或没有帧生成器，回退到完全重新初始化
-                print("解码器不可用，使用完全重新初始化方法")
-                if self._init_decoder():
-                    # 如果之前是播放状态，继续播放
-                    if was_playing:
-                        # 设置状态为播放
-                        self._state = self.PlayingState
-                        self.stateChanged.emit(self._state)
-                        
-                        # 启动定时器
-                        self.timer.start()
-                        self.position_timer.start()
-                        
-                        # 启动音频播放
-                        self.audio_paused = False
-                        self.audio_playing = True
-                        print("音频播放已从新位置继续")
-                        
-                        # 如果需要重新创建音频线程
-                        if hasattr(self, 'audio_data') and self.audio_data is not None:
-                            # 始终创建新的音频播放线程
-                            self.audio_thread = threading.Thread(target=self._play_audio)
-                            self.audio_thread.daemon = True
-                            self.audio_thread.start()
-                
-            print(f"位置已设置到: {self.current_position}ms")
+                    logger.warning("填充帧缓冲区错误: %s", e)
+                    break
+            
+            self._seekFinished.emit((serial, position, decoder, generator, buffer))
         except Exception as e:
-            print(f"设置位置错误: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.warning("快速seek失败，回退到重新初始化解码器: %s", e)
+            self._seekFinished.emit((serial, position, None, None, None))
+    
+    def _on_seek_finished(self, result):
+        """
+        跳转线程完成后在界面线程中切换到新解码器
+        :param result: (跳转序号, 位置, 解码器, 帧生成器, 帧缓冲区)，解码器为None表示快速跳转失败
+        """
+        serial, position, decoder, generator, buffer = result
+        
+        # 跳转已被新的跳转取代，或期间已停止/切换媒体
+        if serial != self._seek_serial or self.decoder is None:
+            if decoder is not None:
+                try:
+                    decoder.terminate()
+                except Exception:
+                    pass
+            return
+        
+        try:
+            if decoder is None:
+                # 快速seek失败，回退到完全重新初始化解码器
+                self._reinit_at(position)
+                return
+            
+            # 终止旧解码器进程并切换到新解码器
+            try:
+                self.decoder.terminate()
+            except Exception as e:
+                logger.warning("关闭解码器错误: %s", e)
+            self.decoder = decoder
+            self.frame_generator = generator
+            
+            self.frame_buffer = buffer
+            
+            # 视频已跳转，音频直接移动读取位置，无需重新提取音频或重建线程
+            self.seek_position = 0
+            self._seek_audio(position)
+            logger.debug("成功使用快速seek跳转到: %sms，已预加载%s帧", position, len(self.frame_buffer))
+            
+            # 跳转期间仍处于播放状态则继续播放
+            if self._state == self.PlayingState:
+                self.timer.start()
+                self.position_timer.start()
+                self.audio_paused = False
+                self.audio_playing = True
+                logger.debug("音频播放已从新位置继续")
+        except Exception:
+            self._log_seek_error(position)
+    
+    def _log_seek_error(self, position):
+        """
+        记录跳转错误及堆栈，连续出错时每秒最多记录一次
+        :param position: 位置（毫秒）
+        """
+        now = time.monotonic()
+        if now - self._last_err_log > 1.0:
+            self._last_err_log = now
+            logger.exception("设置位置错误: %sms", position)
+    
+    def _reinit_at(self, position):
+        """
+        重新初始化解码器并从指定位置继续
+        :param position: 位置（毫秒）
+        """
+        self.seek_position = position
+        if not self._init_decoder():
+            raise Exception("重新初始化解码器失败")
+        
+        # 如果之前是播放状态，继续播放
+        if self._state == self.PlayingState:
+            # 启动定时器
+            self.timer.start()
+            self.position_timer.start()
+            
+            # 启动音频播放
+            self.audio_paused = False
+            self.audio_playing = True
+            logger.debug("音频播放已从新位置继续")
+            
+            # 通知音频工作线程从新位置继续播放
+            if self._has_audio:
+                self._audio_cmd_q.put(('seek', self.current_position))
+                self._audio_cmd_q.put(('play', None))
+        
+        logger.debug("位置已设置到: %sms", self.current_position)
+    
     
     def position(self):
         """
@@ -898,7 +1071,7 @@ class DeffcodePlayer(QObject):
         
         # 存储音量设置，实际音频播放时会应用此音量
         # 注意：DeffcodePlayer没有audio_player属性，只有audio_playing标志
-        print(f"音频音量已设置为: {self._volume}%")
+        logger.debug("音频音量已设置为: %s%%", self._volume)
 
     
     def volume(self):
@@ -957,6 +1130,22 @@ class DeffcodePlaylist(QObject):
         # 播放模式
         self.play_mode = self.Sequential
         
+        # 随机播放顺序，全部播放完一轮后重新打乱
+        self._rng = random.Random()
+        self._shuffle_order = []
+        self._shuffle_pos = 0
+        
+        # 后台预先打开的下一项解码器 {索引: (路径, 解码器)}
+        self._prefetched = {}
+        self._prefetch_lock = threading.Lock()
+        
+        # 切换项目时延迟加载媒体，合并快速连续的切换
+        self._pending_load_index = -1
+        self._load_timer = QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self._load_timer.setInterval(50)
+        self._load_timer.timeout.connect(self._apply_pending_load)
+        
         # 播放器
         self.player = None
     
@@ -973,14 +1162,17 @@ class DeffcodePlaylist(QObject):
         :param media: 媒体路径
         """
         if hasattr(media, 'canonicalUrl'):
-            # 如果是QMediaContent，获取URL
-            url = media.canonicalUrl().toString()
-            if url.startswith('file:///'):
-                url = url[8:]  # 移除file:///前缀
-            self.items.append(url)
+            # 如果是QMediaContent，本地文件取本地路径（兼容各平台），否则保留URL
+            url = media.canonicalUrl()
+            self.items.append(url.toLocalFile() or url.toString())
         else:
             # 否则假设是文件路径
             self.items.append(media)
+        
+        # 随机播放顺序已生成时，把新项插入本轮尚未播放的部分
+        if self._shuffle_order:
+            pos = self._rng.randint(self._shuffle_pos, len(self._shuffle_order))
+            self._shuffle_order.insert(pos, len(self.items) - 1)
     
     def clear(self):
         """
@@ -988,6 +1180,10 @@ class DeffcodePlaylist(QObject):
         """
         self.items = []
         self.current_index = -1
+        self._load_timer.stop()
+        self._pending_load_index = -1
+        self._on_mode_or_list_change()
+        self._drop_prefetched()
     
     def mediaCount(self):
         """
@@ -1010,90 +1206,178 @@ class DeffcodePlaylist(QObject):
         """
         if 0 <= index < len(self.items):
             self.current_index = index
-            # 发出索引改变信号
+            # 发出索引改变信号，界面立即更新高亮
             self.currentIndexChanged.emit(index)
             if self.player:
-                self.player.stop()
-                self.player.setMedia(self.items[index])
-                self.player.play()
+                # 延迟加载媒体，快速连续切换时只打开最后一项
+                self._pending_load_index = index
+                self._load_timer.start()
     
-    def next(self):
+    def _apply_pending_load(self):
         """
-        播放下一个
+        加载并播放最后一次选择的项
         """
-        if not self.items:
+        index = self._pending_load_index
+        self._pending_load_index = -1
+        if not (0 <= index < len(self.items)) or not self.player:
             return
-            
-        if self.play_mode == self.CurrentItemOnce:
-            # 单个播放模式，不切换
-            return
-            
-        if self.play_mode == self.CurrentItemInLoop:
-            # 单个循环模式，重新播放当前项
-            if self.current_index >= 0 and self.player:
-                self.player.stop()
-                self.player.setMedia(self.items[self.current_index])
-                self.player.play()
-            return
-            
-        if self.play_mode == self.Sequential:
-            # 顺序播放模式
-            next_index = self.current_index + 1
-            if next_index >= len(self.items):
-                if self.play_mode == self.Loop:
-                    # 列表循环模式，回到开始
-                    next_index = 0
-                else:
-                    # 顺序播放模式，结束
-                    return
-        elif self.play_mode == self.Random:
-            # 随机播放模式
-            import random
-            next_index = random.randint(0, len(self.items) - 1)
+        
+        self.player.stop()
+        prepared = self._take_prefetched(index)
+        if prepared is not None:
+            self.player.setPreparedSource(self.items[index], prepared)
         else:
-            # 默认顺序播放
-            next_index = (self.current_index + 1) % len(self.items)
+            self.player.setMedia(self.items[index])
+        self.player.play()
         
-        self.setCurrentIndex(next_index)
+        # 当前项开始播放后，在后台预先打开下一项
+        next_index = index + 1
+        if next_index >= len(self.items) and self.play_mode == self.Loop:
+            next_index = 0
+        if next_index < len(self.items) and next_index != index:
+            threading.Thread(target=self._prefetch, args=(next_index, self.items[next_index]),
+                             daemon=True).start()
+    
+    def _prefetch(self, index, media_path):
+        """
+        预先打开指定项的解码器（后台线程）
+        :param index: 索引
+        :param media_path: 文件路径
+        """
+        decoder = self.player.prepareSource(media_path)
+        if decoder is None:
+            return
+        with self._prefetch_lock:
+            # 只保留最新的一项，关闭过期的预取
+            stale = list(self._prefetched.values())
+            self._prefetched = {index: (media_path, decoder)}
+        for _, old_decoder in stale:
+            self._terminate_quietly(old_decoder)
+    
+    def _take_prefetched(self, index):
+        """
+        取出指定项预先打开的解码器
+        :param index: 索引
+        :return: 解码器，没有可用的预取时返回None
+        """
+        with self._prefetch_lock:
+            entry = self._prefetched.pop(index, None)
+        if entry is None:
+            return None
+        media_path, decoder = entry
+        # 列表内容变化后索引可能对应了其他文件
+        if media_path != self.items[index]:
+            self._terminate_quietly(decoder)
+            return None
+        return decoder
+    
+    def _drop_prefetched(self):
+        """
+        关闭所有预先打开的解码器
+        """
+        with self._prefetch_lock:
+            stale = list(self._prefetched.values())
+            self._prefetched = {}
+        for _, decoder in stale:
+            self._terminate_quietly(decoder)
+    
+    @staticmethod
+    def _terminate_quietly(decoder):
+        """
+        关闭解码器，忽略错误
+        :param decoder: FFdecoder实例
+        """
+        try:
+            decoder.terminate()
+        except Exception:
+            pass
+    
+    def _next_random(self):
+        """
+        获取随机播放模式下的下一个索引
+        按打乱后的顺序依次取出，一轮内不重复，并跳过当前正在播放的项
+        :return: 索引
+        """
+        count = len(self.items)
+        while True:
+            if self._shuffle_pos >= len(self._shuffle_order):
+                # 一轮播放完毕，重新打乱顺序
+                self._shuffle_order = self._rng.sample(range(count), count)
+                self._shuffle_pos = 0
+            index = self._shuffle_order[self._shuffle_pos]
+            self._shuffle_pos += 1
+            # 列表变化后可能残留越界索引；只有一项时允许重复
+            if index < count and (index != self.current_index or count == 1):
+                return index
+    
+    def next(self):
+        """
+        播放下一个
+        """
+        self._advance(1)
     
     def previous(self):
         """
         播放上一个
         """
-        if not self.items:
+        self._advance(-1)
+    
+    def _advance(self, direction):
+        """
+        按播放模式切换到相邻项
+        :param direction: 1为下一个，-1为上一个
+        """
+        count = len(self.items)
+        if not count:
             return
-            
-        if self.play_mode == self.CurrentItemOnce or self.play_mode == self.CurrentItemInLoop:
+        
+        if self.play_mode == self.CurrentItemOnce and direction > 0:
+            # 单个播放模式，不切换到下一项
+            return
+        
+        if self.play_mode in (self.CurrentItemOnce, self.CurrentItemInLoop):
             # 单个播放或单个循环模式，重新播放当前项
             if self.current_index >= 0 and self.player:
                 self.player.stop()
                 self.player.setMedia(self.items[self.current_index])
                 self.player.play()
             return
-            
-        if self.play_mode == self.Sequential or self.play_mode == self.Loop:
-            # 顺序播放或列表循环模式
-            prev_index = self.current_index - 1
-            if prev_index < 0:
-                if self.play_mode == self.Loop:
-                    # 列表循环模式，跳到结尾
-                    prev_index = len(self.items) - 1
-                else:
-                    # 顺序播放模式，保持在开始
-                    prev_index = 0
-        elif self.play_mode == self.Random:
+        
+        if self.play_mode == self.Random:
             # 随机播放模式
-            import random
-            prev_index = random.randint(0, len(self.items) - 1)
-        else:
-            # 默认顺序播放
-            prev_index = (self.current_index - 1) if self.current_index > 0 else 0
+            self.setCurrentIndex(self._next_random())
+            return
         
-        self.setCurrentIndex(prev_index)
+        index = self.current_index + direction
+        if not 0 <= index < count:
+            if self.play_mode == self.Loop:
+                # 列表循环模式，首尾相接
+                index %= count
+            elif direction > 0:
+                # 顺序播放模式，播放到结尾后结束
+                return
+            else:
+                # 顺序播放模式，保持在开始
+                index = 0
+        self.setCurrentIndex(index)
     
     def setPlaybackMode(self, mode):
         """
         设置播放模式
         :param mode: 播放模式
         """
-        self.play_mode = mode
\ No newline at end of file
+        if mode == self.play_mode:
+            return
+        self.play_mode = mode
+        self._on_mode_or_list_change()
+    
+    def _on_mode_or_list_change(self):
+        """
+        播放模式或列表变化时重新生成随机播放顺序
+        """
+        count = len(self.items)
+        if self.play_mode == self.Random and count:
+            self._shuffle_order = self._rng.sample(range(count), count)
+        else:
+            self._shuffle_order = []
+        self._shuffle_pos = 0
\ No newline at end of file
@@ -6,58 +6,312 @@ XPlayer - Deffcode视频显示组件
 提供基于Deffcode的视频显示功能，替代VLC视频显示组件
 """
 
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
+import threading
+
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QOpenGLWidget, QSizePolicy
+from PyQt5.QtCore import (Qt, QTimer, QSize, QRunnable, QThreadPool, QMetaObject,
+                          pyqtSignal)
+from PyQt5.QtGui import (QPixmap, QImage, QPainter, QOpenGLContext, QOpenGLShader,
+                         QOpenGLShaderProgram)
+
+try:
+    from OpenGL import GL
+except ImportError:  # 未安装PyOpenGL时回退到QLabel软件缩放
+    GL = None
+
+# 绘制全屏矩形的顶点着色器
+_VERTEX_SHADER = """
+attribute vec2 position;
+attribute vec2 texcoord;
+varying vec2 v_texcoord;
+void main() {
+    gl_Position = vec4(position, 0.0, 1.0);
+    v_texcoord = texcoord;
+}
+"""
+
+# 采样视频帧纹理的片段着色器
+_FRAGMENT_SHADER = """
+uniform sampler2D tex;
+varying vec2 v_texcoord;
+void main() {
+    gl_FragColor = texture2D(tex, v_texcoord);
+}
+"""
+
+
+def _opengl_available():
+    """
+    检测OpenGL渲染是否可用
+    :return: 已安装PyOpenGL且能创建桌面OpenGL上下文时返回True
+    """
+    if GL is None:
+        return False
+    context = QOpenGLContext()
+    if not context.create():
+        return False
+    # OpenGL ES（Windows上的ANGLE、嵌入式/ARM Linux）不支持GL_BGRA上传和行长度等桌面OpenGL调用
+    return not context.isOpenGLES()
+
+
+class GLVideoView(QOpenGLWidget):
+    """OpenGL视频显示控件，将视频帧上传为纹理，由GPU完成缩放"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        
+        # 着色器程序和纹理，在initializeGL中创建
+        self._program = None
+        self._texture = None
+        self._tex_size = None  # 当前纹理尺寸 (宽, 高)
+        
+        # 全屏矩形的顶点坐标和纹理坐标（图像首行对应画面顶部）
+        self._vertices = np.array([-1, -1, 1, -1, -1, 1, 1, 1], dtype=np.float32)
+        self._texcoords = np.array([0, 1, 1, 1, 0, 0, 1, 0], dtype=np.float32)
+    
+    def initializeGL(self):
+        """初始化着色器程序和纹理"""
+        self._program = QOpenGLShaderProgram(self)
+        self._program.addShaderFromSourceCode(QOpenGLShader.Vertex, _VERTEX_SHADER)
+        self._program.addShaderFromSourceCode(QOpenGLShader.Fragment, _FRAGMENT_SHADER)
+        self._program.link()
+        
+        # 创建纹理，使用线性过滤由GPU完成双线性缩放
+        self._texture = GL.glGenTextures(1)
+        self._tex_size = None
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+        
+        GL.glClearColor(0.0, 0.0, 0.0, 1.0)
+        
+        # 上下文销毁前释放纹理
+        self.context().aboutToBeDestroyed.connect(self._cleanup)
+    
+    def _cleanup(self):
+        """释放OpenGL资源"""
+        if self._texture is not None:
+            self.makeCurrent()
+            GL.glDeleteTextures([self._texture])
+            self._texture = None
+            self._tex_size = None
+            self.doneCurrent()
+    
+    def update_frame(self, qimage):
+        """上传视频帧到纹理
+        :param qimage: QImage对象，表示视频帧
+        """
+        # 控件尚未显示时OpenGL未初始化，跳过该帧
+        if self._texture is None:
+            return
+        
+        # 纹理按BGRA字节序上传，其他格式先转换为32位格式
+        if qimage.format() not in (QImage.Format_RGB32, QImage.Format_ARGB32,
+                                   QImage.Format_ARGB32_Premultiplied):
+            qimage = qimage.convertToFormat(QImage.Format_RGB32)
+        width, height = qimage.width(), qimage.height()
+        
+        # 直接引用QImage的像素数据，不复制
+        bits = qimage.constBits()
+        bits.setsize(qimage.sizeInBytes())
+        data = np.frombuffer(bits, dtype=np.uint8)
+        
+        self.makeCurrent()
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._texture)
+        GL.glPixelStorei(GL.GL_UNPACK_ROW_LENGTH, qimage.bytesPerLine() // 4)
+        if self._tex_size != (width, height):
+            # 尺寸变化时重新分配纹理
+            GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, width, height, 0,
+                            GL.GL_BGRA, GL.GL_UNSIGNED_BYTE, data)
+            self._tex_size = (width, height)
+        else:
+            GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, 0, 0, width, height,
+                               GL.GL_BGRA, GL.GL_UNSIGNED_BYTE, data)
+        GL.glPixelStorei(GL.GL_UNPACK_ROW_LENGTH, 0)
+        self.doneCurrent()
+        
+        self.update()
+    
+    def paintGL(self):
+        """绘制视频帧纹理，保持宽高比居中显示"""
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+        if self._tex_size is None:
+            return
+        
+        # 按宽高比计算居中的视口，其余区域保持黑色
+        ratio = self.devicePixelRatioF()
+        view_width = int(self.width() * ratio)
+        view_height = int(self.height() * ratio)
+        target = QSize(*self._tex_size).scaled(view_width, view_height, Qt.KeepAspectRatio)
+        GL.glViewport((view_width - target.width()) // 2, (view_height - target.height()) // 2,
+                      target.width(), target.height())
+        
+        self._program.bind()
+        self._program.setUniformValue("tex", 0)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._texture)
+        
+        position = self._program.attributeLocation("position")
+        texcoord = self._program.attributeLocation("texcoord")
+        GL.glEnableVertexAttribArray(position)
+        GL.glEnableVertexAttribArray(texcoord)
+        GL.glVertexAttribPointer(position, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, self._vertices)
+        GL.glVertexAttribPointer(texcoord, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, self._texcoords)
+        GL.glDrawArrays(GL.GL_TRIANGLE_STRIP, 0, 4)
+        GL.glDisableVertexAttribArray(position)
+        GL.glDisableVertexAttribArray(texcoord)
+        self._program.release()
+
+
+class _ScaleTask(QRunnable):
+    """在线程池中缩放视频帧的任务"""
+    
+    def __init__(self, image, size, ready_signal):
+        super().__init__()
+        self.image = image
+        self.size = size
+        self.ready_signal = ready_signal
+    
+    def run(self):
+        """缩放图像并通过信号发送结果，信号以队列方式回到GUI线程"""
+        self.ready_signal.emit(self.image.scaled(self.size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+
 
 class DeffcodeVideoWidget(QWidget):
     """Deffcode视频显示组件，提供视频显示功能"""
     
-    def __init__(self, parent=None):
+    # 工作线程缩放完成信号
+    _scaled_ready = pyqtSignal(QImage)
+    
+    def __init__(self, parent=None, use_opengl=True):
         super().__init__(parent)
         
         # 创建布局
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
         
-        # 创建标签用于显示视频帧
-        self.video_label = QLabel()
-        self.video_label.setAlignment(Qt.AlignCenter)
-        self.video_label.setStyleSheet("background-color: black;")
-        
-        # 添加到布局
-        self.layout.addWidget(self.video_label)
+        # 优先使用OpenGL显示，由GPU完成缩放；不可用时使用QLabel软件缩放
+        self.gl_view = None
+        self.video_label = None
+        if use_opengl and _opengl_available():
+            self.gl_view = GLVideoView()
+            self.layout.addWidget(self.gl_view)
+        else:
+            # 创建标签用于显示视频帧
+            self.video_label = QLabel()
+            self.video_label.setAlignment(Qt.AlignCenter)
+            self.video_label.setStyleSheet("background-color: black;")
+            # 忽略像素图的尺寸提示，标签大小完全由布局决定，窗口可以自由缩小
+            self.video_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+            
+            # 添加到布局
+            self.layout.addWidget(self.video_label)
         
         # 设置背景色
         self.setStyleSheet("background-color: black;")
+        
+        # 缩放目标尺寸缓存，帧尺寸和控件尺寸都不变时无需重新计算
+        self._last_src_size = None
+        self._last_dst_size = None
+        self._target_size = None
+        
+        # 最近一次显示的帧（独立的副本），暂停或停止时窗口大小变化用它重新缩放
+        self._last_frame = None
+        
+        # 帧缩放在线程池中完成，同一时间只缩放一帧
+        self._scale_pending = False
+        self._scaled_ready.connect(self._on_scaled)
+        
+        # 复用的显示像素图（双缓冲）
+        self._pixmap_pool = [QPixmap(1, 1), QPixmap(1, 1)]
+        self._pool_index = 0
+        
+        # 最新帧槽位，只保留一帧，由绘制定时器按屏幕刷新率取出显示
+        # 定时器只在有新帧时运行，空闲、暂停和停止时不唤醒界面线程
+        self._latest = None
+        self._latest_lock = threading.Lock()
+        self._paint_timer = QTimer(self)
+        self._paint_timer.setInterval(16)
+        self._paint_timer.timeout.connect(self._flush)
+    
+    def resizeEvent(self, event):
+        """窗口大小变化时重新缩放最近的帧，暂停或停止时画面也能跟随窗口大小"""
+        super().resizeEvent(event)
+        # OpenGL显示由GPU按控件大小绘制，只有标签显示需要重新缩放
+        if self.video_label is not None and self._last_frame is not None:
+            self.post_frame(self._last_frame)
     
     def get_video_widget(self):
         """获取视频控件，用于设置到播放器"""
-        return self.video_label
+        return self.gl_view if self.gl_view is not None else self.video_label
     
     def update_frame(self, qimage):
         """更新视频帧
         :param qimage: QImage对象，表示视频帧
         """
-        if qimage:
-            # 转换QImage为QPixmap并显示
-            pixmap = QPixmap.fromImage(qimage)
-            
-            # 根据控件大小缩放图像，保持宽高比
-            scaled_pixmap = pixmap.scaled(self.video_label.size(), 
-                                         Qt.KeepAspectRatio, 
-                                         Qt.SmoothTransformation)
-            
-            self.video_label.setPixmap(scaled_pixmap)
+        if qimage is None or qimage.isNull():
+            return
+        self.post_frame(qimage)
     
-    def resizeEvent(self, event):
-        """重写大小调整事件，确保视频帧正确缩放"""
-        super().resizeEvent(event)
+    def post_frame(self, qimage):
+        """提交最新视频帧，由绘制定时器取出显示，未显示的旧帧直接被覆盖
+        :param qimage: QImage对象，表示视频帧
+        """
+        with self._latest_lock:
+            self._latest = qimage
+        # 定时器只能在所属线程中启动，其他线程调用时自动排队到界面线程；已在运行时不重启，避免推迟绘制
+        if not self._paint_timer.isActive():
+            QMetaObject.invokeMethod(self._paint_timer, "start")
+    
+    def _flush(self):
+        """绘制定时器回调，显示最新提交的视频帧"""
+        # 上一帧仍在缩放中时保留最新帧，等缩放完成后再取
+        if self._scale_pending:
+            return
+        
+        with self._latest_lock:
+            qimage, self._latest = self._latest, None
+        if qimage is None:
+            # 没有新帧，停止定时器，等下一次提交帧时再启动
+            self._paint_timer.stop()
+            return
+        
+        # OpenGL显示直接上传纹理，缩放由GPU完成
+        if self.gl_view is not None:
+            self.gl_view.update_frame(qimage)
+            return
+        
+        # 播放器会复用帧缓冲区，复制一份供工作线程缩放
+        frame = qimage.copy()
+        self._last_frame = frame
+        
+        # 帧尺寸或控件尺寸变化时才重新计算保持宽高比的目标尺寸，窗口大小变化由下一帧体现
+        src_size = frame.size()
+        dst_size = self.video_label.size()
+        if src_size != self._last_src_size or dst_size != self._last_dst_size:
+            self._target_size = src_size.scaled(dst_size, Qt.KeepAspectRatio)
+            self._last_src_size = src_size
+            self._last_dst_size = dst_size
+        
+        # QImage.scaled是线程安全的，在线程池中缩放，GUI线程只需转换为QPixmap
+        self._scale_pending = True
+        QThreadPool.globalInstance().start(_ScaleTask(frame, self._target_size, self._scaled_ready))
+    
+    def _on_scaled(self, image):
+        """工作线程缩放完成，显示缩放后的帧"""
+        self._scale_pending = False
+        
+        # 目标尺寸变化时重新分配像素图
+        if self._pixmap_pool[0].size() != image.size():
+            self._pixmap_pool = [QPixmap(image.size()) for _ in range(2)]
         
-        # 如果标签中有图像，重新缩放它
-        if not self.video_label.pixmap() is None:
-            current_pixmap = self.video_label.pixmap()
-            scaled_pixmap = current_pixmap.scaled(self.video_label.size(), 
-                                                Qt.KeepAspectRatio, 
-                                                Qt.SmoothTransformation)
-            self.video_label.setPixmap(scaled_pixmap)
\ No newline at end of file
+        # 交替绘制到两个像素图中，标签持有的那个不会被改写，也不用每帧分配新像素图
+        pixmap = self._pixmap_pool[self._pool_index]
+        self._pool_index ^= 1
+        painter = QPainter(pixmap)
+        painter.drawImage(0, 0, image)
+        painter.end()
+        self.video_label.setPixmap(pixmap)
@@ -9,16 +9,20 @@ XPlayer - 多媒体播放器
 
 import sys
 import os
+import logging
+import shelve
+import time
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QSlider, QLabel, 
-                             QFileDialog, QListWidget, QMenu, QAction, 
+                             QFileDialog, QListWidget, QListView, QMenu, QAction, 
                              QSystemTrayIcon, QStyle, QComboBox, QTabWidget,
                              QListWidgetItem, QLineEdit, QMessageBox, QDialog,
                              QShortcut, QGroupBox, QFormLayout, QRadioButton,
                              QButtonGroup)
-from PyQt5.QtCore import (Qt, QUrl, QTimer, QTime, QSettings, QPoint, QSize,
-                          QDir, QStandardPaths, QEvent)
-from PyQt5.QtMultimedia import QMediaPlaylist
+from PyQt5.QtCore import (Qt, QUrl, QTimer, QSettings, QPoint, QSize,
+                          QStandardPaths, QEvent, QObject, QRunnable,
+                          QThreadPool, pyqtSignal)
 from PyQt5.QtGui import QIcon, QKeySequence
 
 # 导入Deffcode播放器组件
@@ -27,6 +31,178 @@ from deffcode_player import DeffcodePlayer, DeffcodePlaylist
 # 导入Deffcode视频显示组件
 from deffcode_video_widget import DeffcodeVideoWidget
 
+logger = logging.getLogger(__name__)
+
+# 支持的媒体文件扩展名
+MEDIA_EXTENSIONS = frozenset({".mp3", ".wav", ".mp4", ".avi", ".mkv"})
+
+# 播放模式，按设置页中播放模式按钮的编号排列
+PLAY_MODES = (
+    DeffcodePlaylist.Sequential,
+    DeffcodePlaylist.Random,
+    DeffcodePlaylist.CurrentItemOnce,
+    DeffcodePlaylist.CurrentItemInLoop,
+    DeffcodePlaylist.Loop,
+)
+
+# 历史记录最多保留的条数
+HISTORY_CAP = 1000
+
+# 快捷键名称及默认按键，按设置页中的顺序排列
+DEFAULT_SHORTCUTS = {
+    "play": "Space",
+    "stop": "Ctrl+S",
+    "next": "Ctrl+Right",
+    "prev": "Ctrl+Left",
+    "vol_up": "Ctrl+Up",
+    "vol_down": "Ctrl+Down",
+}
+
+# 浅色主题样式表
+LIGHT_QSS = """
+QWidget {
+    background-color: #f0f0f0;
+    color: #333333;
+}
+QMenuBar, QMenu {
+    background-color: #e0e0e0;
+}
+QPushButton {
+    background-color: #e0e0e0;
+    border: 1px solid #c0c0c0;
+    padding: 5px;
+    border-radius: 3px;
+}
+QPushButton:hover {
+    background-color: #d0d0d0;
+}
+QSlider::groove:horizontal {
+    background: #c0c0c0;
+    height: 8px;
+    border-radius: 4px;
+}
+QSlider::handle:horizontal {
+    background: #808080;
+    width: 16px;
+    margin-top: -4px;
+    margin-bottom: -4px;
+    border-radius: 8px;
+}
+QTabWidget::pane {
+    border: 1px solid #c0c0c0;
+}
+QTabBar::tab {
+    background: #e0e0e0;
+    border: 1px solid #c0c0c0;
+    padding: 6px;
+}
+QTabBar::tab:selected {
+    background: #f0f0f0;
+}
+"""
+
+# 深色主题样式表
+DARK_QSS = """
+QWidget {
+    background-color: #2d2d2d;
+    color: #e0e0e0;
+}
+QMenuBar, QMenu {
+    background-color: #3d3d3d;
+}
+QPushButton {
+    background-color: #3d3d3d;
+    border: 1px solid #5d5d5d;
+    padding: 5px;
+    border-radius: 3px;
+    color: #e0e0e0;
+}
+QPushButton:hover {
+    background-color: #4d4d4d;
+}
+QSlider::groove:horizontal {
+    background: #5d5d5d;
+    height: 8px;
+    border-radius: 4px;
+}
+QSlider::handle:horizontal {
+    background: #e0e0e0;
+    width: 16px;
+    margin-top: -4px;
+    margin-bottom: -4px;
+    border-radius: 8px;
+}
+QTabWidget::pane {
+    border: 1px solid #5d5d5d;
+}
+QTabBar::tab {
+    background: #3d3d3d;
+    border: 1px solid #5d5d5d;
+    padding: 6px;
+}
+QTabBar::tab:selected {
+    background: #2d2d2d;
+}
+QLineEdit, QComboBox {
+    background-color: #3d3d3d;
+    border: 1px solid #5d5d5d;
+    color: #e0e0e0;
+}
+"""
+
+
+# 文件夹扫描结果分块交给界面线程的大小
+SCAN_CHUNK_SIZE = 256
+
+
+def iter_media_files(folder_path):
+    """
+    按文件名顺序（不区分大小写）逐个产出文件夹中的媒体文件
+    一次遍历目录，按扩展名（不区分大小写）筛选，排序需要先收集匹配的路径
+    :param folder_path: 文件夹路径
+    :return: 媒体文件路径生成器，文件夹无法读取时不产出任何路径
+    """
+    try:
+        with os.scandir(folder_path) as entries:
+            paths = [entry.path for entry in entries
+                     if entry.is_file() and os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS]
+    except OSError:
+        return
+    paths.sort(key=lambda path: os.path.basename(path).lower())
+    yield from paths
+
+
+class _ScanSignals(QObject):
+    """扫描任务的信号，QRunnable不是QObject，需要单独的对象发送信号"""
+    chunk = pyqtSignal(str, list)  # 文件夹路径, 一块媒体文件路径
+    done = pyqtSignal(str, int)  # 文件夹路径, 媒体文件总数
+
+
+class ScanJob(QRunnable):
+    """在线程池中扫描文件夹的任务，边扫描边把结果分块交回界面线程"""
+    
+    def __init__(self, folder_path):
+        super().__init__()
+        self.folder_path = folder_path
+        self.signals = _ScanSignals()
+    
+    def run(self):
+        """扫描文件夹，每凑满一块发送一次"""
+        total = 0
+        buf = []
+        for path in iter_media_files(self.folder_path):
+            buf.append(path)
+            if len(buf) == SCAN_CHUNK_SIZE:
+                # 跨线程信号传递的是列表对象本身，发送后换新列表而不是clear()
+                self.signals.chunk.emit(self.folder_path, buf)
+                total += len(buf)
+                buf = []
+        if buf:
+            self.signals.chunk.emit(self.folder_path, buf)
+            total += len(buf)
+        self.signals.done.emit(self.folder_path, total)
+
+
 class XPlayer(QMainWindow):
     """主窗口类"""
     
@@ -40,6 +216,12 @@ class XPlayer(QMainWindow):
         # 初始化设置
         self.settings = QSettings("XPlayer", "Settings")
         
+        # 历史记录延迟同步定时器，播放过程中的多次修改合并为一次同步到磁盘
+        self._history_save_timer = QTimer(self)
+        self._history_save_timer.setSingleShot(True)
+        self._history_save_timer.setInterval(2000)
+        self._history_save_timer.timeout.connect(self._flush_history)
+        
         # 初始化播放器和播放列表
         self.init_player()
         
@@ -65,8 +247,34 @@ class XPlayer(QMainWindow):
         self.player.setPlaylist(self.playlist)
         self.playlist.setPlayer(self.player)
         
-        # 播放历史
+        # 正在后台扫描的文件夹 -> 已添加的文件数
+        self._scanning_folders = {}
+        
+        # 当前已应用的主题编号
+        self._current_theme_id = None
+        
+        # 文件和文件夹选择对话框，首次使用时创建
+        self._file_dialog = None
+        self._folder_dialog = None
+        
+        # 快捷键对象及其当前按键文本，按名称缓存
+        self._shortcuts = {}
+        self._shortcut_texts = {}
+        
+        # 播放历史，集合用于快速判断是否已记录
         self.history = []
+        self._history_set = set()
+        
+        # 历史记录数据库（首次使用时打开）及与self.history逐条对应的键
+        self._history_db = None
+        self._history_keys = deque()
+        
+        # 播放列表文件名到行号的索引，同名文件取第一个
+        self._name_to_row = {}
+        
+        # 播放列表各行文本及其小写形式，避免反复从列表控件取文本
+        self._row_texts = []
+        self._row_texts_lower = []
         
         # 播放模式
         self.play_modes = {
@@ -97,14 +305,15 @@ class XPlayer(QMainWindow):
         playlist_widget = QWidget()
         playlist_layout = QVBoxLayout(playlist_widget)
         
-        # 设置页面
-        settings_widget = QWidget()
-        settings_layout = QVBoxLayout(settings_widget)
+        # 设置页面，控件在首次切换到该页时才创建
+        self._settings_page = QWidget()
+        self._settings_built = False
         
         # 添加标签页
         self.tabs.addTab(player_widget, "播放器")
         self.tabs.addTab(playlist_widget, "播放列表")
-        self.tabs.addTab(settings_widget, "设置")
+        self.tabs.addTab(self._settings_page, "设置")
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         
         # 添加标签页到主布局
         main_layout.addWidget(self.tabs)
@@ -115,8 +324,21 @@ class XPlayer(QMainWindow):
         # 播放列表控件
         self.setup_playlist_controls(playlist_layout)
         
-        # 设置控件
-        self.setup_settings_controls(settings_layout)
+        # 音量滑块拖动时的合并定时器，30毫秒内只应用最新的值
+        # 进度条只在松开时跳转：Deffcode每次跳转都要重启FFmpeg解码进程，拖动期间只更新时间标签
+        self._pending_vol = self.volume_slider.value()
+        self._vol_timer = QTimer(self)
+        self._vol_timer.setSingleShot(True)
+        self._vol_timer.setInterval(30)
+        
+        # 进度界面刷新定时器，合并短时间内的多次位置变化，最多每100毫秒刷新一次
+        self._pending_pos = 0
+        self._drag = False  # 是否正在拖动进度条
+        self._last_time_key = (-1, -1)  # 上次显示的(当前秒数, 总秒数)
+        self._ui_tick = QTimer(self)
+        self._ui_tick.setSingleShot(True)
+        self._ui_tick.setInterval(100)
+        self._ui_tick.timeout.connect(self._flush_ui)
         
         # 状态栏
         self.statusBar().showMessage("就绪")
@@ -205,6 +427,7 @@ class XPlayer(QMainWindow):
         # 播放列表
         self.playlist_widget = QListWidget()
         self.playlist_widget.setAlternatingRowColors(True)
+        self._tune_list_widget(self.playlist_widget)
         layout.addWidget(self.playlist_widget)
         
         # 历史播放列表
@@ -213,6 +436,7 @@ class XPlayer(QMainWindow):
         
         self.history_widget = QListWidget()
         self.history_widget.setAlternatingRowColors(True)
+        self._tune_list_widget(self.history_widget)
         self.clear_history_button = QPushButton("清除历史")
         
         history_layout.addWidget(self.history_widget)
@@ -221,6 +445,13 @@ class XPlayer(QMainWindow):
         history_group.setLayout(history_layout)
         layout.addWidget(history_group)
     
+    @staticmethod
+    def _tune_list_widget(widget):
+        """列表项都是单行文本，统一行高并分批布局，避免大量项时逐项计算尺寸"""
+        widget.setUniformItemSizes(True)
+        widget.setLayoutMode(QListView.Batched)
+        widget.setBatchSize(256)
+    
     def setup_settings_controls(self, layout):
         """设置控件"""
         # 主题设置
@@ -273,12 +504,20 @@ class XPlayer(QMainWindow):
         shortcut_group = QGroupBox("快捷键设置")
         shortcut_layout = QFormLayout()
         
-        self.shortcut_play = QLineEdit("Space")
-        self.shortcut_stop = QLineEdit("Ctrl+S")
-        self.shortcut_next = QLineEdit("Ctrl+Right")
-        self.shortcut_prev = QLineEdit("Ctrl+Left")
-        self.shortcut_vol_up = QLineEdit("Ctrl+Up")
-        self.shortcut_vol_down = QLineEdit("Ctrl+Down")
+        self.shortcut_play = QLineEdit(DEFAULT_SHORTCUTS["play"])
+        self.shortcut_stop = QLineEdit(DEFAULT_SHORTCUTS["stop"])
+        self.shortcut_next = QLineEdit(DEFAULT_SHORTCUTS["next"])
+        self.shortcut_prev = QLineEdit(DEFAULT_SHORTCUTS["prev"])
+        self.shortcut_vol_up = QLineEdit(DEFAULT_SHORTCUTS["vol_up"])
+        self.shortcut_vol_down = QLineEdit(DEFAULT_SHORTCUTS["vol_down"])
+        self._shortcut_edits = {
+            "play": self.shortcut_play,
+            "stop": self.shortcut_stop,
+            "next": self.shortcut_next,
+            "prev": self.shortcut_prev,
+            "vol_up": self.shortcut_vol_up,
+            "vol_down": self.shortcut_vol_down,
+        }
         
         shortcut_layout.addRow("播放/暂停:", self.shortcut_play)
         shortcut_layout.addRow("停止:", self.shortcut_stop)
@@ -350,9 +589,12 @@ class XPlayer(QMainWindow):
         self.next_button.clicked.connect(self.next_media)
         
         # 音量控制
-        self.volume_slider.valueChanged.connect(self.player.setVolume)
+        self.volume_slider.valueChanged.connect(self._queue_volume)
+        self._vol_timer.timeout.connect(self._apply_volume)
         
         # 进度控制
+        self.progress_slider.sliderPressed.connect(self.slider_pressed)
+        self.progress_slider.sliderMoved.connect(self.slider_moved)
         self.progress_slider.sliderReleased.connect(self.slider_released)
         self.player.durationChanged.connect(self.update_duration)
         self.player.positionChanged.connect(self.update_position)
@@ -376,60 +618,48 @@ class XPlayer(QMainWindow):
         self.search_button.clicked.connect(self.search_media)
         self.search_input.returnPressed.connect(self.search_media)
         
-        # 设置
-        self.save_settings_button.clicked.connect(self.save_settings)
-        
         # 播放列表信号
         self.playlist.currentIndexChanged.connect(self.playlist_position_changed)
     
+    def _on_tab_changed(self, index):
+        """切换标签页，首次进入设置页时创建设置控件"""
+        if self._settings_built or self.tabs.widget(index) is not self._settings_page:
+            return
+        self._settings_built = True
+        
+        self.setup_settings_controls(QVBoxLayout(self._settings_page))
+        
+        # 按当前生效的设置填充控件
+        self.theme_group.button(self._current_theme_id).setChecked(True)
+        self.playmode_group.button(self._play_mode_id).setChecked(True)
+        for name, edit in self._shortcut_edits.items():
+            edit.setText(self._shortcut_texts[name])
+        
+        self.save_settings_button.clicked.connect(self.save_settings)
+    
     def load_settings(self):
         """加载设置"""
-        # 主题设置
+        # 主题设置（设置页的控件在创建时再按当前状态填充）
         theme = self.settings.value("theme", 0, int)
-        if theme == 0:
-            self.theme_light.setChecked(True)
-            self.apply_light_theme()
-        elif theme == 1:
-            self.theme_dark.setChecked(True)
-            self.apply_dark_theme()
-        else:
-            self.theme_system.setChecked(True)
-            self.apply_system_theme()
+        if theme not in (0, 1):
+            theme = 2  # 其他值按跟随系统处理
+        self.apply_theme(theme)
         
         # 播放模式设置
         play_mode = self.settings.value("play_mode", 0, int)
-        if play_mode == 0:
-            self.mode_sequential.setChecked(True)
-            self.playlist.setPlaybackMode(DeffcodePlaylist.Sequential)
-        elif play_mode == 1:
-            self.mode_random.setChecked(True)
-            self.playlist.setPlaybackMode(DeffcodePlaylist.Random)
-        elif play_mode == 2:
-            self.mode_once.setChecked(True)
-            self.playlist.setPlaybackMode(DeffcodePlaylist.CurrentItemOnce)
-        elif play_mode == 3:
-            self.mode_repeat_one.setChecked(True)
-            self.playlist.setPlaybackMode(DeffcodePlaylist.CurrentItemInLoop)
-        else:
-            self.mode_repeat_all.setChecked(True)
-            self.playlist.setPlaybackMode(DeffcodePlaylist.Loop)
+        if not 0 <= play_mode < len(PLAY_MODES):
+            play_mode = len(PLAY_MODES) - 1  # 无效值按列表循环处理
+        self._play_mode_id = play_mode
+        self.playlist.setPlaybackMode(PLAY_MODES[play_mode])
         
-        # 快捷键设置
-        self.shortcut_play.setText(self.settings.value("shortcut_play", "Space"))
-        self.shortcut_stop.setText(self.settings.value("shortcut_stop", "Ctrl+S"))
-        self.shortcut_next.setText(self.settings.value("shortcut_next", "Ctrl+Right"))
-        self.shortcut_prev.setText(self.settings.value("shortcut_prev", "Ctrl+Left"))
-        self.shortcut_vol_up.setText(self.settings.value("shortcut_vol_up", "Ctrl+Up"))
-        self.shortcut_vol_down.setText(self.settings.value("shortcut_vol_down", "Ctrl+Down"))
-        
-        # 应用快捷键
-        self.apply_shortcuts()
+        # 快捷键设置，一次读出所有按键文本
+        self.apply_shortcuts({
+            name: self.settings.value(f"shortcut_{name}", default)
+            for name, default in DEFAULT_SHORTCUTS.items()
+        })
         
         # 加载历史记录
-        history_list = self.settings.value("history", [])
-        if history_list:
-            self.history = history_list
-            self.update_history_widget()
+        self.load_history()
     
     def save_settings(self):
         """保存设置"""
@@ -439,27 +669,115 @@ class XPlayer(QMainWindow):
         # 播放模式设置
         self.settings.setValue("play_mode", self.playmode_group.checkedId())
         
-        # 快捷键设置
-        self.settings.setValue("shortcut_play", self.shortcut_play.text())
-        self.settings.setValue("shortcut_stop", self.shortcut_stop.text())
-        self.settings.setValue("shortcut_next", self.shortcut_next.text())
-        self.settings.setValue("shortcut_prev", self.shortcut_prev.text())
-        self.settings.setValue("shortcut_vol_up", self.shortcut_vol_up.text())
-        self.settings.setValue("shortcut_vol_down", self.shortcut_vol_down.text())
+        # 快捷键设置，每个输入框只读取一次
+        shortcut_texts = {name: edit.text() for name, edit in self._shortcut_edits.items()}
+        for name, text in shortcut_texts.items():
+            self.settings.setValue(f"shortcut_{name}", text)
         
         # 应用设置
         self.apply_theme()
         self.apply_play_mode()
-        self.apply_shortcuts()
+        self.apply_shortcuts(shortcut_texts)
         
-        # 保存历史记录
-        self.settings.setValue("history", self.history)
+        # 一次性写入磁盘
+        self.settings.sync()
         
         QMessageBox.information(self, "设置", "设置已保存")
     
-    def apply_theme(self):
-        """应用主题"""
-        theme_id = self.theme_group.checkedId()
+    def _history_store(self):
+        """
+        获取历史记录数据库，首次调用时在应用数据目录下打开
+        数据库无法打开时（已被另一个XPlayer锁定、文件损坏或目录不可写）改用内存字典，本次运行不保存历史记录
+        :return: shelve数据库或字典，键为纳秒时间戳字符串，值为文件名
+        """
+        if self._history_db is None:
+            try:
+                data_dir = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+                os.makedirs(data_dir, exist_ok=True)
+                self._history_db = shelve.open(os.path.join(data_dir, "history.db"))
+            except Exception as e:
+                logger.warning("无法打开历史记录数据库，本次运行不保存历史记录: %s", e)
+                self._history_db = {}
+        return self._history_db
+    
+    def load_history(self):
+        """从历史记录数据库加载最近的记录"""
+        db = self._history_store()
+        
+        # 旧版本把整个历史列表存在设置里，迁移一次后删除
+        if self.settings.contains("history"):
+            old_history = self.settings.value("history", [])
+            if isinstance(old_history, str):
+                old_history = [old_history]
+            if not db:
+                for name in old_history:
+                    self.add_history(name)
+            self.settings.remove("history")
+        
+        keys = sorted(db.keys())
+        for key in keys[:-HISTORY_CAP]:
+            del db[key]
+        self._history_keys = deque(keys[-HISTORY_CAP:])
+        self.history = [db[key] for key in self._history_keys]
+        self._history_set = set(self.history)
+        self.update_history_widget()
+    
+    def add_history(self, name):
+        """
+        追加一条历史记录，超过上限时删除最早的记录
+        :param name: 文件名
+        """
+        db = self._history_store()
+        
+        # 键按时间递增，保证排序后即为播放顺序
+        stamp = time.time_ns()
+        if self._history_keys and stamp <= int(self._history_keys[-1]):
+            stamp = int(self._history_keys[-1]) + 1
+        key = "%020d" % stamp
+        
+        db[key] = name
+        self._history_keys.append(key)
+        self.history.append(name)
+        self._history_set.add(name)
+        self.history_widget.addItem(name)
+        
+        while len(self._history_keys) > HISTORY_CAP:
+            del db[self._history_keys.popleft()]
+            self._history_set.discard(self.history.pop(0))
+            self.history_widget.takeItem(0)
+        
+        self._mark_history_dirty()
+    
+    def _mark_history_dirty(self):
+        """标记历史记录已修改，2秒内的多次修改合并为一次同步"""
+        if not self._history_save_timer.isActive():
+            self._history_save_timer.start()
+    
+    def _flush_history(self):
+        """把历史记录数据库同步到磁盘"""
+        self._history_save_timer.stop()
+        if isinstance(self._history_db, shelve.Shelf):
+            self._history_db.sync()
+    
+    def closeEvent(self, event):
+        """关闭窗口前同步并关闭历史记录数据库"""
+        self._history_save_timer.stop()
+        if isinstance(self._history_db, shelve.Shelf):
+            self._history_db.close()
+            self._history_db = None
+        super().closeEvent(event)
+    
+    def apply_theme(self, theme_id=None):
+        """
+        应用主题，主题未变化时不重新设置样式表
+        :param theme_id: 主题编号，默认取设置页中选中的主题
+        """
+        if theme_id is None:
+            theme_id = self.theme_group.checkedId()
+        if theme_id == self._current_theme_id:
+            return
+        self._current_theme_id = theme_id
+        
         if theme_id == 0:
             self.apply_light_theme()
         elif theme_id == 1:
@@ -469,97 +787,11 @@ class XPlayer(QMainWindow):
     
     def apply_light_theme(self):
         """应用浅色主题"""
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #f0f0f0;
-                color: #333333;
-            }
-            QMenuBar, QMenu {
-                background-color: #e0e0e0;
-            }
-            QPushButton {
-                background-color: #e0e0e0;
-                border: 1px solid #c0c0c0;
-                padding: 5px;
-                border-radius: 3px;
-            }
-            QPushButton:hover {
-                background-color: #d0d0d0;
-            }
-            QSlider::groove:horizontal {
-                background: #c0c0c0;
-                height: 8px;
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #808080;
-                width: 16px;
-                margin-top: -4px;
-                margin-bottom: -4px;
-                border-radius: 8px;
-            }
-            QTabWidget::pane {
-                border: 1px solid #c0c0c0;
-            }
-            QTabBar::tab {
-                background: #e0e0e0;
-                border: 1px solid #c0c0c0;
-                padding: 6px;
-            }
-            QTabBar::tab:selected {
-                background: #f0f0f0;
-            }
-        """)
+        self.setStyleSheet(LIGHT_QSS)
     
     def apply_dark_theme(self):
         """应用深色主题"""
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #2d2d2d;
-                color: #e0e0e0;
-            }
-            QMenuBar, QMenu {
-                background-color: #3d3d3d;
-            }
-            QPushButton {
-                background-color: #3d3d3d;
-                border: 1px solid #5d5d5d;
-                padding: 5px;
-                border-radius: 3px;
-                color: #e0e0e0;
-            }
-            QPushButton:hover {
-                background-color: #4d4d4d;
-            }
-            QSlider::groove:horizontal {
-                background: #5d5d5d;
-                height: 8px;
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #e0e0e0;
-                width: 16px;
-                margin-top: -4px;
-                margin-bottom: -4px;
-                border-radius: 8px;
-            }
-            QTabWidget::pane {
-                border: 1px solid #5d5d5d;
-            }
-            QTabBar::tab {
-                background: #3d3d3d;
-                border: 1px solid #5d5d5d;
-                padding: 6px;
-            }
-            QTabBar::tab:selected {
-                background: #2d2d2d;
-            }
-            QLineEdit, QComboBox {
-                background-color: #3d3d3d;
-                border: 1px solid #5d5d5d;
-                color: #e0e0e0;
-            }
-        """)
+        self.setStyleSheet(DARK_QSS)
     
     def apply_system_theme(self):
         """应用系统主题"""
@@ -571,94 +803,124 @@ class XPlayer(QMainWindow):
     def apply_play_mode(self):
         """应用播放模式"""
         mode_id = self.playmode_group.checkedId()
-        if mode_id == 0:
-            self.playlist.setPlaybackMode(DeffcodePlaylist.Sequential)
-        elif mode_id == 1:
-            self.playlist.setPlaybackMode(DeffcodePlaylist.Random)
-        elif mode_id == 2:
-            self.playlist.setPlaybackMode(DeffcodePlaylist.CurrentItemOnce)
-        elif mode_id == 3:
-            self.playlist.setPlaybackMode(DeffcodePlaylist.CurrentItemInLoop)
-        else:
-            self.playlist.setPlaybackMode(DeffcodePlaylist.Loop)
-    
-    def apply_shortcuts(self):
-        """应用快捷键"""
-        # 清除旧的快捷键
-        try:
-            self.shortcut_play_key.activated.disconnect()
-            self.shortcut_stop_key.activated.disconnect()
-            self.shortcut_next_key.activated.disconnect()
-            self.shortcut_prev_key.activated.disconnect()
-            self.shortcut_vol_up_key.activated.disconnect()
-            self.shortcut_vol_down_key.activated.disconnect()
-        except:
-            pass
-        
-        # 创建新的快捷键
-        self.shortcut_play_key = QShortcut(QKeySequence(self.shortcut_play.text()), self)
-        self.shortcut_stop_key = QShortcut(QKeySequence(self.shortcut_stop.text()), self)
-        self.shortcut_next_key = QShortcut(QKeySequence(self.shortcut_next.text()), self)
-        self.shortcut_prev_key = QShortcut(QKeySequence(self.shortcut_prev.text()), self)
-        self.shortcut_vol_up_key = QShortcut(QKeySequence(self.shortcut_vol_up.text()), self)
-        self.shortcut_vol_down_key = QShortcut(QKeySequence(self.shortcut_vol_down.text()), self)
-        
-        # 连接信号
-        self.shortcut_play_key.activated.connect(self.toggle_play)
-        self.shortcut_stop_key.activated.connect(self.stop)
-        self.shortcut_next_key.activated.connect(self.next_media)
-        self.shortcut_prev_key.activated.connect(self.prev_media)
-        self.shortcut_vol_up_key.activated.connect(self.volume_up)
-        self.shortcut_vol_down_key.activated.connect(self.volume_down)
+        if not 0 <= mode_id < len(PLAY_MODES):
+            mode_id = len(PLAY_MODES) - 1  # 未选中时按列表循环处理
+        self._play_mode_id = mode_id
+        self.playlist.setPlaybackMode(PLAY_MODES[mode_id])
+    
+    def apply_shortcuts(self, vals=None):
+        """
+        应用快捷键
+        :param vals: 快捷键名称到按键文本的字典，默认取设置页输入框中的文本
+        """
+        if vals is None:
+            vals = {name: edit.text() for name, edit in self._shortcut_edits.items()}
+        
+        slots = {
+            "play": self.toggle_play,
+            "stop": self.stop,
+            "next": self.next_media,
+            "prev": self.prev_media,
+            "vol_up": self.volume_up,
+            "vol_down": self.volume_down,
+        }
+        for name, text in vals.items():
+            self._ensure_shortcut(name, text, slots[name])
+    
+    def _ensure_shortcut(self, name, text, slot):
+        """
+        创建或更新快捷键，每个功能只创建一次QShortcut，按键文本变化时才更新
+        :param name: 快捷键名称
+        :param text: 按键序列文本
+        :param slot: 触发时调用的槽函数
+        """
+        shortcut = self._shortcuts.get(name)
+        if shortcut is None:
+            shortcut = QShortcut(QKeySequence(text), self)
+            shortcut.activated.connect(slot)
+            self._shortcuts[name] = shortcut
+        elif self._shortcut_texts.get(name) != text:
+            shortcut.setKey(QKeySequence(text))
+        self._shortcut_texts[name] = text
     
     def open_file(self):
         """打开文件"""
-        file_dialog = QFileDialog()
-        file_dialog.setFileMode(QFileDialog.ExistingFiles)
-        file_dialog.setNameFilter("媒体文件 (*.mp3 *.wav *.mp4 *.avi *.mkv)")
-        
-        if file_dialog.exec_():
-            file_paths = file_dialog.selectedFiles()
+        # 对话框只创建一次，之后重复使用
+        if self._file_dialog is None:
+            self._file_dialog = QFileDialog(self)
+            self._file_dialog.setFileMode(QFileDialog.ExistingFiles)
+            self._file_dialog.setNameFilter("媒体文件 (*.mp3 *.wav *.mp4 *.avi *.mkv)")
+        
+        if self._file_dialog.exec_():
+            file_paths = self._file_dialog.selectedFiles()
             self.add_to_playlist(file_paths)
     
     def open_folder(self):
         """打开文件夹"""
-        folder_dialog = QFileDialog()
-        folder_dialog.setFileMode(QFileDialog.Directory)
-        folder_dialog.setOption(QFileDialog.ShowDirsOnly, True)
-        
-        if folder_dialog.exec_():
-            folder_path = folder_dialog.selectedFiles()[0]
+        # 对话框只创建一次，之后重复使用
+        if self._folder_dialog is None:
+            self._folder_dialog = QFileDialog(self)
+            self._folder_dialog.setFileMode(QFileDialog.Directory)
+            self._folder_dialog.setOption(QFileDialog.ShowDirsOnly, True)
+        
+        if self._folder_dialog.exec_():
+            folder_path = self._folder_dialog.selectedFiles()[0]
             self.add_folder_to_playlist(folder_path)
     
     def add_folder_to_playlist(self, folder_path):
-        """将文件夹中的媒体文件添加到播放列表"""
-        media_extensions = [".mp3", ".wav", ".mp4", ".avi", ".mkv"]
-        
-        dir = QDir(folder_path)
-        dir.setNameFilters(["*" + ext for ext in media_extensions])
-        dir.setFilter(QDir.Files | QDir.NoDotAndDotDot)
-        
-        file_list = dir.entryList()
-        file_paths = [os.path.join(folder_path, file) for file in file_list]
+        """将文件夹中的媒体文件添加到播放列表，扫描在线程池中进行"""
+        # 同一文件夹正在扫描时不重复提交
+        if folder_path in self._scanning_folders:
+            return
+        self._scanning_folders[folder_path] = 0
         
-        if file_paths:
-            self.add_to_playlist(file_paths)
+        job = ScanJob(folder_path)
+        job.signals.chunk.connect(self._on_scan_chunk)
+        job.signals.done.connect(self._on_scan_done)
+        QThreadPool.globalInstance().start(job)
+        self.statusBar().showMessage(f"正在扫描 {folder_path} ...")
+    
+    def _on_scan_chunk(self, folder_path, file_paths):
+        """收到一块扫描结果，立即添加到播放列表"""
+        added = self._scanning_folders.get(folder_path, 0)
+        # 只有第一块需要决定是否开始播放
+        self.add_to_playlist(file_paths, autoplay=(added == 0))
+        self._scanning_folders[folder_path] = added + len(file_paths)
+    
+    def _on_scan_done(self, folder_path, total):
+        """文件夹扫描完成"""
+        self._scanning_folders.pop(folder_path, None)
+        if total:
+            self.statusBar().showMessage(f"已添加 {total} 个文件到播放列表")
         else:
+            self.statusBar().clearMessage()
             QMessageBox.information(self, "提示", "所选文件夹中没有支持的媒体文件")
     
-    def add_to_playlist(self, file_paths):
-        """将文件添加到播放列表"""
+    def add_to_playlist(self, file_paths, autoplay=True):
+        """
+        将文件添加到播放列表
+        :param file_paths: 文件路径列表
+        :param autoplay: 当前没有播放时是否从第一个文件开始播放
+        """
+        # 直接使用文件路径，播放列表会处理URL转换
         for path in file_paths:
-            # 直接使用文件路径，QtPlaylist会处理URL转换
             self.playlist.addMedia(path)
-            file_name = os.path.basename(path)
-            self.playlist_widget.addItem(file_name)
+        
+        # 一次性添加所有列表项，只触发一次布局和重绘
+        first_row = self.playlist_widget.count()
+        names = [os.path.basename(path) for path in file_paths]
+        self.playlist_widget.setUpdatesEnabled(False)
+        self.playlist_widget.addItems(names)
+        self.playlist_widget.setUpdatesEnabled(True)
+        
+        for row, file_name in enumerate(names, first_row):
+            self._name_to_row.setdefault(file_name, row)
+        self._row_texts.extend(names)
+        self._row_texts_lower.extend(name.lower() for name in names)
         
         # 如果当前没有播放，则开始播放第一个文件
-        if self.player.state() != DeffcodePlayer.PlayingState:
+        if autoplay and self.player.state() != DeffcodePlayer.PlayingState:
             self.playlist.setCurrentIndex(0)
-            self.player.play()
             
         # 更新状态栏
         self.statusBar().showMessage(f"已添加 {len(file_paths)} 个文件到播放列表")
@@ -700,32 +962,77 @@ class XPlayer(QMainWindow):
         """设置播放位置"""
         self.player.setPosition(position)
         
+    def slider_pressed(self):
+        """进度条按下事件处理，拖动期间不再用播放位置刷新进度条"""
+        self._drag = True
+    
     def slider_released(self):
         """进度条释放事件处理"""
-        # 只有在用户松开进度条后才更新位置
+        self._drag = False
+        # 松开进度条时才跳转到最终位置
         position = self.progress_slider.value()
         self.player.setPosition(position)
     
+    def slider_moved(self, position):
+        """拖动进度条时只显示目标时间，不跳转"""
+        self.update_time_label(position)
+    
+    def _queue_volume(self, volume):
+        """音量滑块变化时记录音量，30毫秒内的多次变化只设置一次"""
+        self._pending_vol = volume
+        if not self._vol_timer.isActive():
+            self._vol_timer.start()
+    
+    def _apply_volume(self):
+        """设置最新的音量"""
+        self.player.setVolume(self._pending_vol)
+    
     def update_duration(self, duration):
         """更新总时长"""
         self.progress_slider.setRange(0, duration)
-        self.update_time_label()
+        if not self._ui_tick.isActive():
+            self._ui_tick.start()
     
     def update_position(self, position):
-        """更新当前位置"""
-        if not self.progress_slider.isSliderDown():
-            self.progress_slider.setValue(position)
-        self.update_time_label()
+        """更新当前位置，实际刷新由定时器合并执行"""
+        self._pending_pos = position
+        if not self._ui_tick.isActive():
+            self._ui_tick.start()
     
-    def update_time_label(self):
-        position = self.player.current_position
-        duration = self.player.duration
-        
-        # Convert position to int before passing to addMSecs
-        position_time = QTime(0, 0, 0).addMSecs(int(position))
-        duration_time = QTime(0, 0, 0).addMSecs(duration)
+    def _flush_ui(self):
+        """刷新进度条和时间标签"""
+        if not self._drag:
+            # 程序设置的进度不需要发出valueChanged
+            self.progress_slider.blockSignals(True)
+            self.progress_slider.setValue(self._pending_pos)
+            self.progress_slider.blockSignals(False)
+            self.update_time_label()
+    
+    def update_time_label(self, position=None):
+        """
+        更新时间标签，显示的秒数不变时不重新设置文本
+        :param position: 显示的位置（毫秒），默认为当前播放位置
+        """
+        if position is None:
+            position = self._pending_pos
+        pos_s = int(position) // 1000
+        dur_s = int(self.player.duration) // 1000
+        if (pos_s, dur_s) == self._last_time_key:
+            return
+        self._last_time_key = (pos_s, dur_s)
         
-        self.time_label.setText(f"{position_time.toString('mm:ss')} / {duration_time.toString('mm:ss')}")
+        # 时长达到1小时才显示小时位
+        with_hours = dur_s >= 3600
+        self.time_label.setText(f"{self._format_time(pos_s, with_hours)} / {self._format_time(dur_s, with_hours)}")
+    
+    @staticmethod
+    def _format_time(seconds, with_hours):
+        """将秒数格式化为mm:ss或h:mm:ss"""
+        minutes, secs = divmod(seconds, 60)
+        if with_hours:
+            hours, minutes = divmod(minutes, 60)
+            return "%d:%02d:%02d" % (hours, minutes, secs)
+        return "%02d:%02d" % (minutes, secs)
     
     def update_player_state(self, state):
         """更新播放器状态"""
@@ -733,11 +1040,10 @@ class XPlayer(QMainWindow):
             self.play_button.setText("暂停")
             # 添加到历史记录
             current_index = self.playlist.currentIndex()
-            if current_index >= 0 and current_index < self.playlist_widget.count():
-                current_item = self.playlist_widget.item(current_index).text()
-                if current_item not in self.history:
-                    self.history.append(current_item)
-                    self.update_history_widget()
+            if 0 <= current_index < len(self._row_texts):
+                current_item = self._row_texts[current_index]
+                if current_item not in self._history_set:
+                    self.add_history(current_item)
         else:
             self.play_button.setText("播放")
     
@@ -750,23 +1056,25 @@ class XPlayer(QMainWindow):
     def playlist_double_clicked(self, index):
         """双击播放列表项"""
         self.playlist.setCurrentIndex(index.row())
-        self.player.play()
     
     def history_double_clicked(self, index):
         """双击历史记录项"""
-        history_item = self.history_widget.item(index.row()).text()
+        # 历史记录列表与self.history逐行对应
+        history_item = self.history[index.row()]
         
         # 查找播放列表中对应的项
-        for i in range(self.playlist_widget.count()):
-            if self.playlist_widget.item(i).text() == history_item:
-                self.playlist.setCurrentIndex(i)
-                self.player.play()
-                break
+        row = self._name_to_row.get(history_item)
+        if row is not None:
+            self.playlist.setCurrentIndex(row)
     
     def clear_history(self):
         """清除历史记录"""
         self.history = []
+        self._history_set.clear()
+        self._history_keys.clear()
         self.history_widget.clear()
+        self._history_store().clear()
+        self._mark_history_dirty()
     
     def update_history_widget(self):
         """更新历史记录列表"""
@@ -777,19 +1085,12 @@ class XPlayer(QMainWindow):
     def search_media(self):
         """搜索媒体文件"""
         search_text = self.search_input.text().lower()
-        if not search_text:
-            # 如果搜索框为空，显示所有项
-            for i in range(self.playlist_widget.count()):
-                self.playlist_widget.item(i).setHidden(False)
-            return
         
-        # 搜索并隐藏不匹配的项
-        for i in range(self.playlist_widget.count()):
-            item = self.playlist_widget.item(i)
-            if search_text not in item.text().lower():
-                item.setHidden(True)
-            else:
-                item.setHidden(False)
+        # 在缓存的小写文本中匹配（不区分大小写），搜索框为空时显示所有项，期间暂停重绘
+        self.playlist_widget.setUpdatesEnabled(False)
+        for i, text in enumerate(self._row_texts_lower):
+            self.playlist_widget.item(i).setHidden(search_text not in text)
+        self.playlist_widget.setUpdatesEnabled(True)
     
     def playlist_position_changed(self, position):
         """播放列表位置改变"""
@@ -804,5 +1105,8 @@ class XPlayer(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # 应用数据目录（历史记录数据库所在位置）由组织名和应用名决定
+    app.setOrganizationName("XPlayer")
+    app.setApplicationName("XPlayer")
     player = XPlayer()
     sys.exit(app.exec_())
\ No newline at end of file
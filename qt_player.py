@@ -45,6 +45,7 @@ class QtPlayer(QObject):
         self._rate = 1.0
         
         # 连接信号
+        # 内部信号的参数类型为QMediaPlayer.State和qint64，与本对象的int信号不匹配，不能直接信号转发信号
         self.media_player.stateChanged.connect(self._on_state_changed)
         self.media_player.positionChanged.connect(self._on_position_changed)
         self.media_player.durationChanged.connect(self._on_duration_changed)
@@ -55,7 +56,7 @@ class QtPlayer(QObject):
         :param state: QMediaPlayer.State
         """
         # 将QMediaPlayer.State转换为int发送信号
-        self.stateChanged.emit(state)
+        self.stateChanged.emit(int(state))
     
     def _on_position_changed(self, position):
         """
@@ -63,7 +64,7 @@ class QtPlayer(QObject):
         :param position: qint64
         """
         # 将qint64转换为int发送信号
-        self.positionChanged.emit(position)
+        self.positionChanged.emit(int(position))
     
     def _on_duration_changed(self, duration):
         """
@@ -71,7 +72,7 @@ class QtPlayer(QObject):
         :param duration: qint64
         """
         # 将qint64转换为int发送信号
-        self.durationChanged.emit(duration)
+        self.durationChanged.emit(int(duration))
     
     def setVideoOutput(self, video_widget):
         """
@@ -146,6 +147,9 @@ class QtPlayer(QObject):
         设置播放位置
         :param position: 位置（毫秒）
         """
+        # 与当前位置相差不到50毫秒时跳转没有意义
+        if abs(position - self.media_player.position()) < 50:
+            return
         self.media_player.setPosition(position)
     
     def volume(self):
@@ -160,6 +164,8 @@ class QtPlayer(QObject):
         设置音量
         :param volume: 音量（0-100）
         """
+        if volume == self._volume:
+            return
         self.media_player.setVolume(volume)
         self._volume = volume
     
@@ -175,6 +181,8 @@ class QtPlayer(QObject):
         设置播放速率
         :param rate: 播放速率
         """
+        if rate == self._rate:
+            return
         self.media_player.setPlaybackRate(rate)
         self._rate = rate
 
@@ -219,6 +227,16 @@ class QtPlaylist(QObject):
             # 否则假设是QMediaContent
             return self.media_playlist.addMedia(content)
     
+    def addMediaBatch(self, contents):
+        """
+        批量添加媒体到播放列表，整批只调用一次QMediaPlaylist.addMedia
+        :param contents: QMediaContent实例或文件路径的列表
+        :return: 是否成功
+        """
+        items = [QMediaContent(QUrl.fromLocalFile(content)) if isinstance(content, str) else content
+                 for content in contents]
+        return self.media_playlist.addMedia(items)
+    
     def removeMedia(self, position):
         """
         从播放列表移除媒体
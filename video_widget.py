@@ -23,6 +23,8 @@ class VideoDisplayWidget(QWidget):
         # 创建视频显示控件
         self.video_widget = QVideoWidget()
         self.video_widget.setAspectRatioMode(Qt.KeepAspectRatio)
+        # 视频画面会覆盖整个控件，绘制前不需要清除背景
+        self.video_widget.setAttribute(Qt.WA_OpaquePaintEvent, True)
         
         # 添加到布局
         self.layout.addWidget(self.video_widget)
@@ -7,9 +7,46 @@ XPlayer - VLC播放器组件
 """
 
 import os
+import sys
 import vlc
-from PyQt5.QtCore import QObject, pyqtSignal, QTimer, QUrl
-from PyQt5.QtWidgets import QFrame
+from PyQt5.QtCore import Qt, QObject, pyqtSignal, QUrl
+
+# 按平台选择把视频输出绑定到窗口句柄的方法
+if os.name == "nt":  # Windows
+    _SET_WINDOW = "set_hwnd"
+elif sys.platform == "darwin":  # macOS
+    _SET_WINDOW = "set_nsobject"
+else:  # Linux/Unix
+    _SET_WINDOW = "set_xwindow"
+
+# 进程内共享的VLC实例，创建实例需要扫描插件，只创建一次
+_vlc_instance = None
+
+
+def get_vlc_instance():
+    """
+    获取共享的VLC实例，首次调用时创建
+    :return: vlc.Instance实例
+    """
+    global _vlc_instance
+    if _vlc_instance is None:
+        _vlc_instance = vlc.Instance()
+    return _vlc_instance
+
+
+def _extract_url(content):
+    """
+    获取传给VLC的媒体地址
+    :param content: QMediaContent实例或文件路径
+    :return: 本地文件返回文件路径，其他返回URL字符串
+    """
+    if hasattr(content, 'canonicalUrl'):
+        # 如果是QMediaContent，本地文件转换为路径，toLocalFile会处理平台差异和百分号编码
+        qurl = content.canonicalUrl()
+        return qurl.toLocalFile() if qurl.isLocalFile() else qurl.toString()
+    # 否则假设是文件路径
+    return content
+
 
 class VLCPlayer(QObject):
     """
@@ -22,6 +59,9 @@ class VLCPlayer(QObject):
     positionChanged = pyqtSignal(int)
     durationChanged = pyqtSignal(int)
     
+    # VLC事件(事件类型, 参数)，由VLC线程发出，排队连接到界面线程处理
+    _vlcEvent = pyqtSignal(int, int)
+    
     # 播放状态常量，与QMediaPlayer保持一致
     StoppedState = 0
     PlayingState = 1
@@ -30,15 +70,22 @@ class VLCPlayer(QObject):
     def __init__(self, parent=None):
         super().__init__(parent)
         
-        # 创建VLC实例
-        self.instance = vlc.Instance()
+        # 使用共享的VLC实例
+        self.instance = get_vlc_instance()
         
         # 创建媒体播放器
         self.media_player = self.instance.media_player_new()
         
+        # 当前绑定的视频窗口句柄
+        self._video_handle = None
+        
         # 当前媒体
         self.media = None
         
+        # 当前媒体的事件管理器，需要保留引用，否则回调会随之失效
+        self._media_events = None
+        self._vlcEvent.connect(self._handle_vlc_event, Qt.QueuedConnection)
+        
         # 播放列表
         self.playlist = None
         
@@ -52,31 +99,37 @@ class VLCPlayer(QObject):
         # 播放速率
         self._rate = 1.0
         
-        # 创建定时器，用于更新播放位置
-        self.timer = QTimer(self)
-        self.timer.setInterval(200)  # 200毫秒更新一次
-        self.timer.timeout.connect(self._update_position)
+        # 媒体总时长（毫秒），在媒体变化时更新
+        self._duration = 0
+        
+        # 上次发送位置所在的250毫秒区间，区间不变时不重复发送
+        self._last_emitted_pos = -1
+        
+        # 播放位置、时长和状态都由VLC事件驱动，不再定时查询
+        self._player_events = self.media_player.event_manager()
+        for event_type in (vlc.EventType.MediaPlayerTimeChanged,
+                           vlc.EventType.MediaPlayerLengthChanged,
+                           vlc.EventType.MediaPlayerPlaying,
+                           vlc.EventType.MediaPlayerPaused,
+                           vlc.EventType.MediaPlayerStopped,
+                           vlc.EventType.MediaPlayerEndReached):
+            self._player_events.event_attach(event_type, self._forward_vlc_event)
     
     def setVideoOutput(self, video_widget):
         """
         设置视频输出窗口
         :param video_widget: QVideoWidget或QFrame实例
         """
-        if isinstance(video_widget, QFrame):
-            # 如果是QFrame，直接使用其窗口ID
-            if os.name == "nt":  # Windows
-                self.media_player.set_hwnd(int(video_widget.winId()))
-            else:  # Linux/Unix
-                self.media_player.set_xwindow(int(video_widget.winId()))
-        else:
-            # 尝试获取窗口ID
-            try:
-                if os.name == "nt":  # Windows
-                    self.media_player.set_hwnd(int(video_widget.winId()))
-                else:  # Linux/Unix
-                    self.media_player.set_xwindow(int(video_widget.winId()))
-            except AttributeError:
-                print("错误：无法设置视频输出窗口")
+        # winId()首次调用会创建原生窗口，只取一次
+        try:
+            handle = int(video_widget.winId())
+        except AttributeError:
+            print("错误：无法设置视频输出窗口")
+            return
+        if handle == self._video_handle:
+            return
+        self._video_handle = handle
+        getattr(self.media_player, _SET_WINDOW)(handle)
     
     def setPlaylist(self, playlist):
         """
@@ -90,54 +143,59 @@ class VLCPlayer(QObject):
         设置媒体内容
         :param content: QMediaContent实例或文件路径
         """
-        if hasattr(content, 'canonicalUrl'):
-            # 如果是QMediaContent，获取URL
-            url = content.canonicalUrl().toString()
-            if url.startswith('file:///'):
-                url = url[8:]  # 移除file:///前缀
-        else:
-            # 否则假设是文件路径
-            url = content
+        url = _extract_url(content)
+        
+        # 不再接收上一个媒体的解析事件
+        if self._media_events is not None:
+            self._media_events.event_detach(vlc.EventType.MediaParsedChanged)
         
         # 创建媒体
         self.media = self.instance.media_new(url)
         
-        # 设置到播放器
+        # 设置到播放器，VLC会停止正在播放的媒体，状态同步为停止
         self.media_player.set_media(self.media)
+        self._set_state(self.StoppedState)
+        self._last_emitted_pos = -1
         
-        # 获取媒体信息
-        self.media.parse()
+        # 在VLC线程中异步解析媒体信息，解析完成后再更新时长
+        self._media_events = self.media.event_manager()
+        self._media_events.event_attach(vlc.EventType.MediaParsedChanged, self._forward_vlc_event)
+        self.media.parse_with_options(vlc.MediaParseFlag.local, -1)
         
-        # 发送时长变化信号
-        duration = self.media_player.get_length()
-        self.durationChanged.emit(duration)
+        # 时长未知前先发送0
+        self._duration = 0
+        self.durationChanged.emit(0)
     
     def play(self):
         """
         开始播放
         """
+        if self._state == self.PlayingState:
+            return
         result = self.media_player.play()
         if result == 0:  # 成功
-            self._state = self.PlayingState
-            self.stateChanged.emit(self._state)
-            self.timer.start()  # 启动定时器
+            self._set_state(self.PlayingState)
     
     def pause(self):
         """
         暂停播放
         """
+        # VLC的pause()在暂停状态下会恢复播放，重复暂停时直接返回
+        if self._state == self.PausedState:
+            return
         self.media_player.pause()
-        self._state = self.PausedState
-        self.stateChanged.emit(self._state)
+        self._set_state(self.PausedState)
     
     def stop(self):
         """
         停止播放
         """
+        # 以VLC自身状态为准：播放结束后界面状态已是停止，但VLC仍需stop()才会重置到开头
+        if self.media_player.get_state() in (vlc.State.Stopped, vlc.State.NothingSpecial):
+            self._set_state(self.StoppedState)
+            return
         self.media_player.stop()
-        self._state = self.StoppedState
-        self.stateChanged.emit(self._state)
-        self.timer.stop()  # 停止定时器
+        self._set_state(self.StoppedState)
     
     def state(self):
         """
@@ -158,13 +216,17 @@ class VLCPlayer(QObject):
         获取媒体总时长（毫秒）
         :return: 总时长
         """
-        return self.media_player.get_length()
+        return self._duration
     
     def setPosition(self, position):
         """
         设置播放位置
         :param position: 位置（毫秒）
         """
+        # 与当前位置相差不到50毫秒时跳转没有意义，位置未知（-1）时照常跳转
+        current = self.media_player.get_time()
+        if current >= 0 and abs(position - current) < 50:
+            return
         self.media_player.set_time(position)
     
     def volume(self):
@@ -179,6 +241,8 @@ class VLCPlayer(QObject):
         设置音量
         :param volume: 音量（0-100）
         """
+        if volume == self._volume:
+            return
         self._volume = volume
         self.media_player.audio_set_volume(volume)
     
@@ -194,15 +258,86 @@ class VLCPlayer(QObject):
         设置播放速率
         :param rate: 播放速率
         """
+        if rate == self._rate:
+            return
         self._rate = rate
         self.media_player.set_rate(rate)
     
-    def _update_position(self):
+    def _forward_vlc_event(self, event):
+        """
+        VLC事件回调，运行在VLC线程中，只转发信号，不能直接操作Qt对象
+        :param event: VLC事件
+        """
+        event_type = event.type.value
+        if event_type == vlc.EventType.MediaPlayerTimeChanged.value:
+            payload = event.u.new_time
+        elif event_type == vlc.EventType.MediaPlayerLengthChanged.value:
+            payload = event.u.new_length
+        elif event_type == vlc.EventType.MediaParsedChanged.value:
+            payload = event.u.new_status
+        else:
+            payload = 0
+        self._vlcEvent.emit(event_type, payload)
+    
+    def _handle_vlc_event(self, event_type, payload):
+        """
+        在界面线程中处理VLC事件
+        :param event_type: VLC事件类型
+        :param payload: 事件参数
+        """
+        if event_type == vlc.EventType.MediaPlayerTimeChanged.value:
+            self._on_time_changed(payload)
+        elif event_type == vlc.EventType.MediaPlayerLengthChanged.value:
+            self._on_length_changed(payload)
+        elif event_type == vlc.EventType.MediaPlayerPlaying.value:
+            self._set_state(self.PlayingState)
+        elif event_type == vlc.EventType.MediaPlayerPaused.value:
+            self._set_state(self.PausedState)
+        elif event_type in (vlc.EventType.MediaPlayerStopped.value,
+                            vlc.EventType.MediaPlayerEndReached.value):
+            self._set_state(self.StoppedState)
+        elif event_type == vlc.EventType.MediaParsedChanged.value:
+            self._on_media_parsed()
+    
+    def _set_state(self, state):
         """
-        更新播放位置（内部使用）
+        更新播放状态，状态变化时才发送信号（内部使用）
+        :param state: 播放状态常量
         """
-        if self._state == self.PlayingState:
-            position = self.media_player.get_time()
+        if state != self._state:
+            self._state = state
+            self.stateChanged.emit(state)
+    
+    def _on_media_parsed(self):
+        """
+        媒体解析完成（界面线程），更新时长
+        """
+        if self.media is None:
+            return
+        duration = self.media.get_duration()
+        if duration > 0 and duration != self._duration:
+            self._duration = duration
+            self.durationChanged.emit(duration)
+    
+    def _on_length_changed(self, duration):
+        """
+        VLC得到媒体时长（界面线程），解析未给出时长时以此为准
+        :param duration: 总时长（毫秒）
+        """
+        if duration > 0 and duration != self._duration:
+            self._duration = duration
+            self.durationChanged.emit(duration)
+    
+    def _on_time_changed(self, position):
+        """
+        播放位置变化（界面线程），同一250毫秒区间内只发送一次
+        :param position: 当前位置（毫秒）
+        """
+        if position < 0:
+            return  # 位置未知
+        bucket = position // 250
+        if bucket != self._last_emitted_pos:
+            self._last_emitted_pos = bucket
             self.positionChanged.emit(position)
 
 
@@ -224,8 +359,8 @@ class VLCPlaylist(QObject):
     def __init__(self, parent=None):
         super().__init__(parent)
         
-        # 创建VLC实例
-        self.instance = vlc.Instance()
+        # 使用共享的VLC实例
+        self.instance = get_vlc_instance()
         
         # 媒体列表
         self.media_list = self.instance.media_list_new()
@@ -245,6 +380,9 @@ class VLCPlaylist(QObject):
         
         # 媒体项列表（保存路径）
         self.media_items = []
+        
+        # 媒体MRL到索引的映射，用于根据正在播放的媒体查找索引
+        self._mrl_to_index = {}
     
     def addMedia(self, content):
         """
@@ -252,19 +390,26 @@ class VLCPlaylist(QObject):
         :param content: QMediaContent实例或文件路径
         :return: 是否成功
         """
-        if hasattr(content, 'canonicalUrl'):
-            # 如果是QMediaContent，获取URL
-            url = content.canonicalUrl().toString()
-            if url.startswith('file:///'):
-                url = url[8:]  # 移除file:///前缀
-        else:
-            # 否则假设是文件路径
-            url = content
-        
-        # 创建媒体并添加到列表
-        media = self.instance.media_new(url)
-        self.media_list.add_media(media)
-        self.media_items.append(url)
+        return self.addMediaBatch([content])
+    
+    def addMediaBatch(self, contents):
+        """
+        批量添加媒体到播放列表，整批只加锁一次
+        :param contents: QMediaContent实例或文件路径的列表
+        :return: 是否成功
+        """
+        self.media_list.lock()
+        try:
+            for content in contents:
+                url = _extract_url(content)
+                
+                # 创建媒体并添加到列表
+                media = self.instance.media_new(url)
+                self.media_list.add_media(media)
+                self._mrl_to_index.setdefault(media.get_mrl(), len(self.media_items))
+                self.media_items.append(url)
+        finally:
+            self.media_list.unlock()
         
         return True
     
@@ -272,10 +417,15 @@ class VLCPlaylist(QObject):
         """
         清空播放列表
         """
-        # VLC没有直接的清空方法，我们创建一个新的列表
-        self.media_list = self.instance.media_list_new()
-        self.list_player.set_media_list(self.media_list)
+        # 在原列表上从后往前逐项移除，列表播放器继续使用同一个列表
+        self.media_list.lock()
+        try:
+            for i in range(self.media_list.count() - 1, -1, -1):
+                self.media_list.remove_index(i)
+        finally:
+            self.media_list.unlock()
         self.media_items = []
+        self._mrl_to_index = {}
         self._current_index = -1
     
     def currentIndex(self):
@@ -290,6 +440,9 @@ class VLCPlaylist(QObject):
         设置当前播放项
         :param index: 索引
         """
+        # 正在播放的就是这一项时不重新打开媒体
+        if index == self._current_index and self.list_player.is_playing():
+            return
         if 0 <= index < len(self.media_items):
             self.list_player.play_item_at_index(index)
             self._current_index = index
@@ -339,10 +492,8 @@ class VLCPlaylist(QObject):
         # 获取当前媒体
         current_media = self.media_player.get_media()
         if current_media:
-            # 查找媒体在列表中的索引
-            for i, media_path in enumerate(self.media_items):
-                media = self.instance.media_new(media_path)
-                if media.get_mrl() == current_media.get_mrl():
-                    self._current_index = i
-                    self.currentIndexChanged.emit(i)
-                    break
\ No newline at end of file
+            # 按MRL直接查找媒体在列表中的索引
+            index = self._mrl_to_index.get(current_media.get_mrl())
+            if index is not None and index != self._current_index:
+                self._current_index = index
+                self.currentIndexChanged.emit(index)
\ No newline at end of file
@@ -22,20 +22,17 @@ class VLCVideoWidget(QWidget):
         # 创建视频显示框架
         # 使用QFrame而不是QVideoWidget，因为VLC需要一个窗口句柄
         self.video_frame = QFrame()
-        self.video_frame.setFrameShape(QFrame.StyledPanel)
-        self.video_frame.setFrameShadow(QFrame.Raised)
-        self.video_frame.setAutoFillBackground(True)
+        # 不绘制边框，整个区域交给VLC，Qt没有任何需要绘制的内容
+        self.video_frame.setFrameShape(QFrame.NoFrame)
         
-        # 设置黑色背景
-        palette = self.video_frame.palette()
-        palette.setColor(self.video_frame.backgroundRole(), Qt.black)
-        self.video_frame.setPalette(palette)
+        # VLC直接绘制到原生窗口，Qt不需要为它清除或合成背景
+        self.video_frame.setAttribute(Qt.WA_OpaquePaintEvent, True)
+        self.video_frame.setAttribute(Qt.WA_NoSystemBackground, True)
+        self.video_frame.setAttribute(Qt.WA_PaintOnScreen, True)
+        self.video_frame.setAttribute(Qt.WA_NativeWindow, True)
         
         # 添加到布局
         self.layout.addWidget(self.video_frame)
-        
-        # 设置背景色
-        self.setStyleSheet("background-color: black;")
     
     def get_video_widget(self):
         """获取视频控件，用于设置到播放器"""